@@ -1,5 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
 from app.models import JournalEntry, AgentFollowup
 from app.schemas import AgentFollowupResponse
@@ -9,7 +10,10 @@ from app.services.agent_service import (
     get_ai_companion_response,
     extract_and_analyze_patterns
 )
-from typing import List
+from app.services.analysis_service import load_entry_analysis
+from app.services.stats_service import PATTERN_WINDOW, get_user_stats, refresh_recent_labels
+from app.services.user_patterns_service import get_fresh_patterns, recent_pattern_entries, rolling_entry_patterns
+from typing import List, Optional
 from pydantic import BaseModel
 
 router = APIRouter()
@@ -36,73 +40,88 @@ class PatternAnalysisResponse(BaseModel):
 async def request_followup(
     request: FollowupRequest,
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Request AI followup question based on journal entry content"""
-    entry = db.query(JournalEntry).filter(
+    entry = await db.scalar(select(JournalEntry).where(
         JournalEntry.id == request.entry_id,
         JournalEntry.user_id == current_user["user_id"]
-    ).first()
+    ))
     
     if not entry:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Entry not found")
     
     # Generate intelligent followup based on actual content
-    prompt = generate_intelligent_followup(entry)
+    context = await load_entry_analysis(db, entry)
+    prompt = generate_intelligent_followup(entry, context)
     
     db_followup = AgentFollowup(entry_id=entry.id, prompt=prompt)
     db.add(db_followup)
-    db.commit()
-    db.refresh(db_followup)
+    await db.commit()
+    await db.refresh(db_followup)
     return db_followup
 
 @router.get("/followups/{entry_id}", response_model=List[AgentFollowupResponse])
 async def get_followups(
     entry_id: int,
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get all AI followups for an entry"""
-    entry = db.query(JournalEntry).filter(
+    entry = await db.scalar(select(JournalEntry).where(
         JournalEntry.id == entry_id,
         JournalEntry.user_id == current_user["user_id"]
-    ).first()
+    ))
     
     if not entry:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Entry not found")
     
-    followups = db.query(AgentFollowup).filter(
+    followups = (await db.scalars(select(AgentFollowup).where(
         AgentFollowup.entry_id == entry_id
-    ).all()
+    ).order_by(AgentFollowup.created_at))).all()
     return followups
 
 @router.get("/companion/{entry_id}", response_model=AICompanionResponse)
 async def get_companion_response(
     entry_id: int,
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get complete AI companion analysis of journal entry"""
-    entry = db.query(JournalEntry).filter(
+    entry = await db.scalar(select(JournalEntry).where(
         JournalEntry.id == entry_id,
         JournalEntry.user_id == current_user["user_id"]
-    ).first()
+    ))
     
     if not entry:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Entry not found")
     
-    response = get_ai_companion_response(entry)
+    context = await load_entry_analysis(db, entry)
+    await db.commit()
+    
+    response = get_ai_companion_response(entry, context)
     return AICompanionResponse(**response)
 
 @router.get("/patterns", response_model=PatternAnalysisResponse)
 async def get_pattern_analysis(
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    window: int = Query(PATTERN_WINDOW, ge=1, le=100),
+    days: Optional[int] = Query(None, ge=1)
 ):
-    """Get AI analysis of patterns across all user's entries"""
-    entries = db.query(JournalEntry).filter(
-        JournalEntry.user_id == current_user["user_id"]
-    ).order_by(JournalEntry.created_at.desc()).all()
+    """Get AI analysis of patterns across the user's most recent entries"""
+    if window == PATTERN_WINDOW and days is None:
+        # Counts kept current on every entry write, then the batch-computed table
+        stats = await db.run_sync(get_user_stats, current_user["user_id"])
+        patterns = rolling_entry_patterns(stats)
+        if patterns is not None:
+            return PatternAnalysisResponse(**patterns)
+        
+        stored = await db.run_sync(get_fresh_patterns, current_user["user_id"])
+        if stored is not None and stored.entry_patterns:
+            return PatternAnalysisResponse(**stored.entry_patterns)
+    
+    entries = await db.run_sync(recent_pattern_entries, current_user["user_id"], window, days)
     
     if not entries:
         raise HTTPException(
@@ -110,5 +129,10 @@ async def get_pattern_analysis(
             detail="No entries found for pattern analysis"
         )
     
-    patterns = extract_and_analyze_patterns(entries)
+    contexts = {entry.id: await load_entry_analysis(db, entry) for entry in entries}
+    patterns = extract_and_analyze_patterns(entries, lambda e: contexts.get(e.id))
+    if window == PATTERN_WINDOW and days is None:
+        # Every entry in the window is analyzed now, so the rolling counts can be completed
+        await db.run_sync(refresh_recent_labels, stats)
+    await db.commit()
     return PatternAnalysisResponse(**patterns)
@@ -1,27 +1,29 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+import logging
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import func
 from app.database import get_db
-from app.models import JournalEntry
 from app.schemas import AnalyticsResponse, PatternResult
 from app.auth import get_current_user
-from app.services.pattern_service import find_mood_patterns
-from collections import Counter
-from typing import List
+from app.services.user_patterns_service import compute_mood_patterns, get_fresh_patterns
+from app.services.stats_service import get_user_stats, summarize_stats
+from app.services.keyword_service import top_keywords
+from app.services.trend_service import RESOLUTIONS, get_trend_points, downsample_points
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 @router.get("/summary", response_model=AnalyticsResponse)
 async def get_analytics_summary(
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     try:
-        entries = db.query(JournalEntry).filter(
-            JournalEntry.user_id == current_user["user_id"]
-        ).all()
+        stats = await db.run_sync(get_user_stats, current_user["user_id"])
         
-        if not entries:
+        if not stats.entry_count:
             return AnalyticsResponse(
                 avg_sentiment=0.0,
                 mood_distribution={},
@@ -30,30 +32,20 @@ async def get_analytics_summary(
                 patterns=[]
             )
         
-        sentiments = [e.sentiment_score for e in entries]
-        avg_sentiment = sum(sentiments) / len(sentiments) if sentiments else 0.0
-        
-        mood_counts = Counter([e.mood_level for e in entries])
-        mood_distribution = {str(k): v for k, v in mood_counts.items()}
-        
-        all_keywords = []
-        for entry in entries:
-            if entry.keywords:
-                all_keywords.extend(entry.keywords.split(","))
-        
-        most_common_keywords = [kw.strip() for kw, _ in Counter(all_keywords).most_common(10)]
-        
-        patterns = find_mood_patterns(entries)
+        # Prefer patterns materialized by `manage.py compute-patterns`
+        stored = await db.run_sync(get_fresh_patterns, current_user["user_id"])
+        if stored is not None:
+            patterns = [PatternResult(**p) for p in stored.mood_patterns or []]
+        else:
+            patterns = await db.run_sync(compute_mood_patterns, current_user["user_id"])
         
         return AnalyticsResponse(
-            avg_sentiment=round(avg_sentiment, 2),
-            mood_distribution=mood_distribution,
-            total_entries=len(entries),
-            most_common_keywords=most_common_keywords,
+            **summarize_stats(stats),
+            most_common_keywords=await db.run_sync(top_keywords, current_user["user_id"]),
             patterns=patterns
         )
     except Exception as e:
-        print(f"Error in analytics: {e}")
+        logger.exception("Error in analytics: %s", e)
         return AnalyticsResponse(
             avg_sentiment=0.0,
             mood_distribution={},
@@ -65,28 +57,19 @@ async def get_analytics_summary(
 @router.get("/trends")
 async def get_mood_trends(
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db),
-    days: int = 30
+    db: AsyncSession = Depends(get_db),
+    days: int = 30,
+    resolution: str = Query("raw", pattern=f"^({'|'.join(RESOLUTIONS)})$"),
+    max_points: Optional[int] = Query(None, ge=3)
 ):
     try:
         from datetime import datetime, timedelta
         
         start_date = datetime.utcnow() - timedelta(days=days)
-        entries = db.query(JournalEntry).filter(
-            JournalEntry.user_id == current_user["user_id"],
-            JournalEntry.created_at >= start_date
-        ).order_by(JournalEntry.created_at).all()
-        
-        trends = []
-        for entry in entries:
-            trends.append({
-                "date": entry.created_at.isoformat(),
-                "sentiment": entry.sentiment_score,
-                "mood_level": entry.mood_level,
-                "title": entry.title
-            })
+        trends = await db.run_sync(get_trend_points, current_user["user_id"], start_date, resolution)
+        trends = downsample_points(trends, max_points)
         
-        return {"trends": trends}
+        return {"trends": trends, "resolution": resolution}
     except Exception as e:
-        print(f"Error getting trends: {e}")
-        return {"trends": []}
+        logger.exception("Error getting trends: %s", e)
+        return {"trends": [], "resolution": resolution}
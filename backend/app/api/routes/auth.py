@@ -1,17 +1,20 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
 from app.models import User
-from app.schemas import UserRegister, UserLogin, TokenResponse, UserResponse
-from app.auth import hash_password, verify_password, create_access_token, get_current_user
+from app.schemas import UserRegister, UserLogin, TokenResponse, RefreshRequest, UserResponse
+from app.auth import hash_password, verify_password, needs_rehash, get_current_user
+from app.services.token_service import issue_tokens, rotate_tokens, revoke_tokens, InvalidRefreshTokenError
+from app.services.worker_pool import auth_pool
 
 router = APIRouter()
 
 @router.post("/signup", response_model=TokenResponse)
-async def signup(user_data: UserRegister, db: Session = Depends(get_db)):
-    existing_user = db.query(User).filter(
+async def signup(user_data: UserRegister, db: AsyncSession = Depends(get_db)):
+    existing_user = await db.scalar(select(User).where(
         (User.email == user_data.email) | (User.username == user_data.username)
-    ).first()
+    ))
     
     if existing_user:
         raise HTTPException(
@@ -19,35 +22,62 @@ async def signup(user_data: UserRegister, db: Session = Depends(get_db)):
             detail="Email or username already registered"
         )
     
-    hashed_password = hash_password(user_data.password)
+    hashed_password = await auth_pool.run(hash_password, user_data.password)
     db_user = User(
         email=user_data.email,
         username=user_data.username,
         hashed_password=hashed_password
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.flush()
     
-    access_token = create_access_token(data={"sub": str(db_user.id)})
-    return {"access_token": access_token, "token_type": "bearer"}
+    tokens = await db.run_sync(issue_tokens, db_user.id)
+    await db.commit()
+    return tokens
 
 @router.post("/login", response_model=TokenResponse)
-async def login(user_data: UserLogin, db: Session = Depends(get_db)):
-    db_user = db.query(User).filter(User.email == user_data.email).first()
+async def login(user_data: UserLogin, db: AsyncSession = Depends(get_db)):
+    db_user = await db.scalar(select(User).where(User.email == user_data.email))
     
-    if not db_user or not verify_password(user_data.password, db_user.hashed_password):
+    if not db_user or not await auth_pool.run(verify_password, user_data.password, db_user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid credentials"
         )
     
-    access_token = create_access_token(data={"sub": str(db_user.id)})
-    return {"access_token": access_token, "token_type": "bearer"}
+    # The password is only in hand at login, so that is when a cost change reaches existing hashes
+    if needs_rehash(db_user.hashed_password):
+        db_user.hashed_password = await auth_pool.run(hash_password, user_data.password)
+    
+    tokens = await db.run_sync(issue_tokens, db_user.id)
+    await db.commit()
+    return tokens
+
+@router.post("/refresh", response_model=TokenResponse)
+async def refresh(request: RefreshRequest, db: AsyncSession = Depends(get_db)):
+    """Trade a refresh token for a new token pair, without the password or bcrypt"""
+    try:
+        tokens = await db.run_sync(rotate_tokens, request.refresh_token)
+    except InvalidRefreshTokenError:
+        # Keep the revocation a reused token triggers
+        await db.commit()
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token"
+        )
+    await db.commit()
+    return tokens
+
+@router.post("/logout")
+async def logout(request: RefreshRequest, db: AsyncSession = Depends(get_db)):
+    """Revoke the refresh token's session; its access token lapses on its own"""
+    await db.run_sync(revoke_tokens, request.refresh_token)
+    await db.commit()
+    return {"status": "logged out"}
 
 @router.get("/me", response_model=UserResponse)
-async def me(current_user_data: dict = Depends(get_current_user), db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.id == current_user_data["user_id"]).first()
+async def me(current_user_data: dict = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    user = await db.get(User, current_user_data["user_id"])
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
     return user
@@ -1,103 +1,315 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import json
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
 from app.database import get_db
 from app.models import JournalEntry, User
-from app.schemas import JournalEntryCreate, JournalEntryUpdate, JournalEntryResponse
+from app.schemas import (
+    JournalEntryCreate,
+    JournalEntryUpdate,
+    JournalEntryResponse,
+    JournalEntryImport,
+    BulkImportResponse,
+    EntrySearchResult
+)
 from app.auth import get_current_user
-from app.services.nlp_service import analyze_sentiment_and_keywords
-from typing import List
+from app.services.analysis_service import analyze_content, store_entry_analysis
+from app.services.nlp_service import analyze_many
+from app.services.worker_pool import nlp_pool, PoolSaturatedError
+from app.services.ingest_queue import analysis_queue, enqueue_analysis, apply_enrichment
+from app.services.stats_service import apply_entry_changes, entry_snapshot
+from app.services.keyword_service import set_entry_keywords, insert_keyword_rows
+from app.services.pagination import InvalidCursorError, page_statement, split_page
+from app.services.search_service import search_entries
+from typing import List, Optional
 
 router = APIRouter()
 
+BULK_CHUNK_SIZE = 500
+BULK_MAX_LINE_BYTES = 1_000_000
+BULK_MAX_REPORTED_ERRORS = 100
+
 @router.post("/", response_model=JournalEntryResponse)
 async def create_entry(
     entry_data: JournalEntryCreate,
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    defer_analysis: bool = False
 ):
-    sentiment_score, keywords = analyze_sentiment_and_keywords(entry_data.content)
-    
+    """Create an entry; with defer_analysis the NLP enrichment runs in the background queue"""
+    results = None if defer_analysis else await nlp_pool.run(analyze_content, entry_data.content)
+    db_entry = await db.run_sync(_create_entry, current_user["user_id"], entry_data, results)
+    await db.commit()
+    await db.refresh(db_entry)
+    if defer_analysis:
+        analysis_queue.notify()
+    return db_entry
+
+def _create_entry(db: Session, user_id: int, entry_data: JournalEntryCreate, results: tuple = None) -> JournalEntry:
     db_entry = JournalEntry(
-        user_id=current_user["user_id"],
+        user_id=user_id,
         title=entry_data.title,
         content=entry_data.content,
-        sentiment_score=sentiment_score,
-        keywords=keywords,
         mood_level=entry_data.mood_level
     )
     db.add(db_entry)
-    db.commit()
-    db.refresh(db_entry)
+    
+    if results is None:
+        enqueue_analysis(db, db_entry)
+    else:
+        sentiment_score, keywords, context = results
+        db_entry.sentiment_score = sentiment_score
+        set_entry_keywords(db_entry, keywords)
+        store_entry_analysis(db, db_entry, context)
+    
+    apply_entry_changes(db, user_id, added=[entry_snapshot(db_entry)])
     return db_entry
 
+@router.post("/bulk", response_model=BulkImportResponse)
+async def bulk_import_entries(
+    request: Request,
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Import entries from an NDJSON body, one JournalEntryImport object per line
+    The body is parsed as it streams in; entries are scored and inserted in
+    chunks with one commit per chunk, so memory stays bounded for large files.
+    A chunk that cannot be scored or inserted is rolled back and reported
+    line by line, and the response still counts the chunks that made it.
+    """
+    user_id = current_user["user_id"]
+    result = {"imported": 0, "failed": 0, "errors": []}
+    batch = []
+    
+    def record_error(line_no: int, error: str):
+        result["failed"] += 1
+        if len(result["errors"]) < BULK_MAX_REPORTED_ERRORS:
+            result["errors"].append({"line": line_no, "error": error})
+    
+    def parse_line(line_no: int, raw: bytes):
+        if not raw.strip():
+            return
+        if len(raw) > BULK_MAX_LINE_BYTES:
+            record_error(line_no, f"Line exceeds {BULK_MAX_LINE_BYTES} bytes")
+            return
+        try:
+            batch.append((line_no, JournalEntryImport.model_validate(json.loads(raw))))
+        except ValidationError as e:
+            record_error(line_no, "; ".join(
+                f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in e.errors()
+            ))
+        except ValueError as e:
+            record_error(line_no, f"Invalid JSON: {e}")
+    
+    async def flush():
+        if not batch:
+            return
+        try:
+            result["imported"] += await _import_batch(db, user_id, [item for _, item in batch])
+        except (PoolSaturatedError, SQLAlchemyError) as e:
+            # Only this chunk is lost; earlier chunks are already committed
+            await db.rollback()
+            for line_no, _ in batch:
+                record_error(line_no, f"Import failed: {e.__class__.__name__}")
+        batch.clear()
+    
+    buffer = b""
+    line_no = 0
+    skipping = False
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for raw in lines:
+            line_no += 1
+            if skipping:
+                skipping = False
+                continue
+            parse_line(line_no, raw)
+            if len(batch) >= BULK_CHUNK_SIZE:
+                await flush()
+        
+        if len(buffer) > BULK_MAX_LINE_BYTES and not skipping:
+            record_error(line_no + 1, f"Line exceeds {BULK_MAX_LINE_BYTES} bytes")
+            skipping = True
+        if skipping:
+            buffer = b""
+    
+    if buffer and not skipping:
+        line_no += 1
+        parse_line(line_no, buffer)
+    await flush()
+    
+    return result
+
+async def _import_batch(db: AsyncSession, user_id: int, batch: list) -> int:
+    scores = await nlp_pool.run(analyze_many, [item.content for item in batch])
+    
+    rows = []
+    for item, (sentiment_score, keywords) in zip(batch, scores):
+        rows.append({
+            "user_id": user_id,
+            "title": item.title,
+            "content": item.content,
+            "sentiment_score": sentiment_score,
+            "keywords": keywords,
+            "mood_level": item.mood_level or 0,
+            "analysis_status": "done",
+            "created_at": item.created_at or datetime.utcnow()
+        })
+    
+    await db.run_sync(_insert_batch, user_id, rows)
+    await db.commit()
+    return len(rows)
+
+def _insert_batch(db: Session, user_id: int, rows: list):
+    entry_ids = db.scalars(
+        insert(JournalEntry).returning(JournalEntry.id, sort_by_parameter_order=True), rows
+    ).all()
+    insert_keyword_rows(db, [
+        (entry_id, user_id, row["keywords"]) for entry_id, row in zip(entry_ids, rows)
+    ])
+    apply_entry_changes(db, user_id, added=[
+        (row["sentiment_score"], row["mood_level"]) for row in rows
+    ])
+
 @router.get("/", response_model=List[JournalEntryResponse])
 async def get_entries(
+    response: Response,
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db),
-    limit: int = 50,
-    offset: int = 0
+    db: AsyncSession = Depends(get_db),
+    limit: int = Query(50, ge=1),
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = None
 ):
-    entries = db.query(JournalEntry).filter(
-        JournalEntry.user_id == current_user["user_id"]
-    ).order_by(desc(JournalEntry.created_at)).offset(offset).limit(limit).all()
+    """Newest entries first; pass the X-Next-Cursor header back as `cursor` for the next page"""
+    statement = select(JournalEntry).where(JournalEntry.user_id == current_user["user_id"])
+    try:
+        statement = page_statement(statement, limit, cursor=cursor, offset=offset)
+    except InvalidCursorError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    
+    entries, next_cursor = split_page((await db.scalars(statement)).all(), limit)
+    
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = next_cursor
     return entries
 
+# Declared before /{entry_id} so "search" is not parsed as an entry id
+@router.get("/search", response_model=List[EntrySearchResult])
+async def search_journal(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Full-text search over the user's titles and content, ranked, with highlighted snippets"""
+    return await db.run_sync(search_entries, current_user["user_id"], q, limit)
+
 @router.get("/{entry_id}", response_model=JournalEntryResponse)
 async def get_entry(
     entry_id: int,
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
+):
+    entry = await db.scalar(select(JournalEntry).where(
+        JournalEntry.id == entry_id,
+        JournalEntry.user_id == current_user["user_id"]
+    ))
+    if not entry:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+    return entry
+
+@router.post("/{entry_id}/analyze", response_model=JournalEntryResponse)
+async def analyze_entry(
+    entry_id: int,
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
-    entry = db.query(JournalEntry).filter(
+    """Enrich a pending entry now instead of waiting for the background queue"""
+    entry = await db.scalar(select(JournalEntry).where(
         JournalEntry.id == entry_id,
         JournalEntry.user_id == current_user["user_id"]
-    ).first()
+    ))
     if not entry:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+    
+    if entry.analysis_status != "done":
+        content = entry.content
+        # End the read transaction first; apply_enrichment must open with its write
+        await db.commit()
+        results = await nlp_pool.run(analyze_content, content)
+        await db.run_sync(_apply_manual_analysis, entry, content, results)
+        await db.commit()
+        await db.refresh(entry)
     return entry
 
+def _apply_manual_analysis(db: Session, entry: JournalEntry, content: str, results: tuple):
+    apply_enrichment(db, entry.id, content, results)
+    for job in entry.analysis_jobs:
+        if job.status == "pending":
+            db.delete(job)
+
 @router.put("/{entry_id}", response_model=JournalEntryResponse)
 async def update_entry(
     entry_id: int,
     entry_data: JournalEntryUpdate,
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    entry = db.query(JournalEntry).filter(
+    entry = await db.scalar(select(JournalEntry).where(
         JournalEntry.id == entry_id,
         JournalEntry.user_id == current_user["user_id"]
-    ).first()
+    ))
     if not entry:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
     
+    results = None
+    if entry_data.content is not None:
+        results = await nlp_pool.run(analyze_content, entry_data.content)
+    await db.run_sync(_update_entry, entry, entry_data, results)
+    await db.commit()
+    await db.refresh(entry)
+    return entry
+
+def _update_entry(db: Session, entry: JournalEntry, entry_data: JournalEntryUpdate, results: tuple = None):
+    before = entry_snapshot(entry)
     if entry_data.title is not None:
         entry.title = entry_data.title
-    if entry_data.content is not None:
+    if results is not None:
+        sentiment_score, keywords, context = results
         entry.content = entry_data.content
-        sentiment_score, keywords = analyze_sentiment_and_keywords(entry_data.content)
         entry.sentiment_score = sentiment_score
-        entry.keywords = keywords
+        set_entry_keywords(entry, keywords)
+        entry.analysis_status = "done"
+        store_entry_analysis(db, entry, context)
     if entry_data.mood_level is not None:
         entry.mood_level = entry_data.mood_level
     
-    db.commit()
-    db.refresh(entry)
-    return entry
+    after = entry_snapshot(entry)
+    # New content also means new analysis labels, even when the snapshot is unchanged
+    if after != before or results is not None:
+        apply_entry_changes(db, entry.user_id, removed=[before], added=[after])
 
 @router.delete("/{entry_id}")
 async def delete_entry(
     entry_id: int,
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    entry = db.query(JournalEntry).filter(
+    entry = await db.scalar(select(JournalEntry).where(
         JournalEntry.id == entry_id,
         JournalEntry.user_id == current_user["user_id"]
-    ).first()
+    ))
     if not entry:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
     
-    db.delete(entry)
-    db.commit()
+    snapshot = entry_snapshot(entry)
+    await db.delete(entry)
+    await db.run_sync(apply_entry_changes, current_user["user_id"], removed=[snapshot])
+    await db.commit()
     return {"status": "deleted"}
@@ -1,3 +1,4 @@
+import logging
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
@@ -6,19 +7,33 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 import os
 
+logger = logging.getLogger(__name__)
+
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", 30))
+# bcrypt cost factor; hashes made with another cost are upgraded on the next login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 10))
 
 security = HTTPBearer()
 
+# hash_password and verify_password take tens of milliseconds of CPU each;
+# async routes run them on auth_pool rather than on the event loop.
 def hash_password(password: str) -> str:
-    salt = bcrypt.gensalt(rounds=10)
+    salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
     return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
 
+def needs_rehash(hashed_password: str) -> bool:
+    """True when a bcrypt hash ($2b$<cost>$...) was made with a cost other than BCRYPT_ROUNDS"""
+    try:
+        return int(hashed_password.split("$")[2]) != BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
     if expires_delta:
@@ -29,18 +44,34 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def create_refresh_token(user_id: int, family: str, generation: int, expires_at: datetime) -> str:
+    return jwt.encode(
+        {"sub": str(user_id), "type": "refresh", "fam": family, "gen": generation, "exp": expires_at},
+        SECRET_KEY,
+        algorithm=ALGORITHM
+    )
+
+def decode_refresh_token(token: str) -> Optional[dict]:
+    """Claims of a validly signed, unexpired refresh token, or None"""
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+    if payload.get("type") != "refresh" or "fam" not in payload or "gen" not in payload:
+        return None
+    return payload
+
 def verify_token(token: str) -> dict:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_id = payload.get("sub")
-        if user_id is None:
+        # Refresh tokens are only good at /api/auth/refresh
+        if user_id is None or payload.get("type") == "refresh":
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
         return {"user_id": int(user_id)}
     except (JWTError, ValueError) as e:
-        print(f"JWT Error: {e}")
+        logger.debug("Rejected token: %s", e)
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
 
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
-    token = credentials.credentials
-    print(f"Token received: {token[:20]}..." if token else "No token")
-    return verify_token(token)
+    return verify_token(credentials.credentials)
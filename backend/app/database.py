@@ -1,24 +1,93 @@
 import os
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.ext.asyncio import AsyncAttrs, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker, declarative_base
+from app.db_config import engine_options, is_sqlite, apply_sqlite_pragmas, pool_stats
+from app.services.search_service import init_search
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./mindfulai.db")
 
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {},
-    echo=False
-)
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+def async_database_url(url: str) -> str:
+    """DATABASE_URL with its driver swapped for the async one (aiosqlite, asyncpg)"""
+    scheme, rest = url.split("://", 1)
+    dialect = scheme.split("+", 1)[0]
+    return f"{ASYNC_DRIVERS.get(dialect, scheme)}://{rest}"
+
+# Sync engine and sessions, for init_db, manage.py and the background analysis queue
+engine = create_engine(DATABASE_URL, echo=False, **engine_options(DATABASE_URL))
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
-    try:
+# Async engine and sessions, for the FastAPI routes. Objects stay readable
+# after commit, since an expired attribute cannot lazy-load during serialization.
+async_engine = create_async_engine(
+    async_database_url(DATABASE_URL),
+    echo=False,
+    **engine_options(DATABASE_URL, use_async=True)
+)
+
+if is_sqlite(DATABASE_URL):
+    event.listen(engine, "connect", apply_sqlite_pragmas)
+    event.listen(async_engine.sync_engine, "connect", apply_sqlite_pragmas)
+
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+Base = declarative_base(cls=AsyncAttrs)
+
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
+
+def database_stats() -> dict:
+    return {
+        "dialect": engine.dialect.name,
+        "sync_pool": pool_stats(engine),
+        "async_pool": pool_stats(async_engine.sync_engine),
+    }
 
 def init_db():
     Base.metadata.create_all(bind=engine)
+    add_missing_columns()
+    add_missing_indexes()
+    init_search(engine)
+    backfill_entry_keywords()
+
+def backfill_entry_keywords():
+    """Reads only use entry_keywords, so copy in keywords of entries written before it existed"""
+    # Imported here: the service imports the models, which import this module
+    from app.services.keyword_service import backfill_keywords
+    with SessionLocal() as db:
+        backfill_keywords(db)
+
+def add_missing_columns():
+    """create_all never alters existing tables, so add columns introduced since they were created"""
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(dialect=engine.dialect)}"
+                if column.server_default is not None:
+                    ddl += f" DEFAULT '{column.server_default.arg}'"
+                conn.execute(text(ddl))
+
+def add_missing_indexes():
+    """create_all only builds indexes with new tables, so create ones added to existing tables since"""
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {index["name"] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing:
+                    index.create(conn)
@@ -0,0 +1,135 @@
+import os
+import threading
+import time
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+
+ENVIRONMENT = os.getenv("ENVIRONMENT", "development")
+
+# Pool sizing per ENVIRONMENT; each DB_POOL_* variable overrides its key.
+# Sizes apply per engine, and the sync and async engines each hold a pool.
+POOL_PROFILES = {
+    "development": {"pool_size": 5, "max_overflow": 10, "pool_timeout": 30, "pool_recycle": -1, "pool_pre_ping": False},
+    "test": {"pool_size": 2, "max_overflow": 0, "pool_timeout": 5, "pool_recycle": -1, "pool_pre_ping": False},
+    "production": {"pool_size": 10, "max_overflow": 20, "pool_timeout": 10, "pool_recycle": 1800, "pool_pre_ping": True},
+}
+
+POOL_ENV_OVERRIDES = {
+    "pool_size": ("DB_POOL_SIZE", int),
+    "max_overflow": ("DB_MAX_OVERFLOW", int),
+    "pool_timeout": ("DB_POOL_TIMEOUT", float),
+    "pool_recycle": ("DB_POOL_RECYCLE", int),
+    "pool_pre_ping": ("DB_POOL_PRE_PING", lambda value: value.lower() in ("1", "true", "yes")),
+}
+
+# WAL lets readers run alongside the single writer, and busy_timeout makes a
+# blocked writer wait instead of failing with "database is locked".
+# synchronous=NORMAL is durable across application crashes in WAL mode.
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 5000)),
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", 256 * 1024 * 1024)),
+}
+
+def pool_settings(environment: str = ENVIRONMENT) -> dict:
+    settings = dict(POOL_PROFILES.get(environment, POOL_PROFILES["development"]))
+    for key, (variable, parse) in POOL_ENV_OVERRIDES.items():
+        value = os.getenv(variable)
+        if value is not None:
+            settings[key] = parse(value)
+    return settings
+
+def is_sqlite(url: str) -> bool:
+    return url.startswith("sqlite")
+
+def is_memory_sqlite(url: str) -> bool:
+    return is_sqlite(url) and (":memory:" in url or url.split("://", 1)[1] in ("", "/"))
+
+def engine_options(url: str, use_async: bool = False) -> dict:
+    """create_engine keyword arguments: the timed pool with this environment's sizing"""
+    if is_memory_sqlite(url):
+        # In-memory databases live and die with one connection; keep SQLAlchemy's default pool
+        return {}
+    options = pool_settings()
+    options["poolclass"] = TimedAsyncQueuePool if use_async else TimedQueuePool
+    if is_sqlite(url) and not use_async:
+        options["connect_args"] = {"check_same_thread": False}
+    return options
+
+def apply_sqlite_pragmas(dbapi_connection, connection_record):
+    """Connect-event listener applying SQLITE_PRAGMAS to every new SQLite connection"""
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+class PoolMetrics:
+    """Checkout latency and contention counters for one connection pool"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.waits = 0
+        self.timeouts = 0
+        self.total_checkout = 0.0
+        self.max_checkout = 0.0
+
+    def record(self, elapsed: float, waited: bool, timed_out: bool):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+                self.total_checkout += elapsed
+                self.max_checkout = max(self.max_checkout, elapsed)
+            if waited:
+                self.waits += 1
+
+    def stats(self) -> dict:
+        return {
+            "checkouts": self.checkouts,
+            "waits": self.waits,
+            "timeouts": self.timeouts,
+            "avg_checkout_ms": round(self.total_checkout / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+            "max_checkout_ms": round(self.max_checkout * 1000, 3),
+        }
+
+class TimedPoolMixin:
+    """Times every pool checkout and counts the ones that had to wait for a free connection"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def _do_get(self):
+        # With max_overflow=-1 the pool never blocks
+        limit = self.size() + self._max_overflow
+        waited = self._max_overflow > -1 and self.checkedout() >= limit
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except Exception:
+            self.metrics.record(time.perf_counter() - started, waited, timed_out=True)
+            raise
+        self.metrics.record(time.perf_counter() - started, waited, timed_out=False)
+        return connection
+
+    def stats(self) -> dict:
+        return {
+            "size": self.size(),
+            "checked_out": self.checkedout(),
+            "overflow": self.overflow(),
+            **self.metrics.stats(),
+        }
+
+class TimedQueuePool(TimedPoolMixin, QueuePool):
+    pass
+
+class TimedAsyncQueuePool(TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+def pool_stats(engine) -> dict:
+    pool = engine.pool
+    return pool.stats() if isinstance(pool, TimedPoolMixin) else {"status": pool.status()}
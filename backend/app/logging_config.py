@@ -0,0 +1,41 @@
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+_listener = None
+
+def setup_logging(level: str = LOG_LEVEL):
+    """
+    Send the app's loggers through a queue drained by a background thread
+    A request handler that logs only pays for a queue put; formatting and
+    the stderr write happen on the listener thread. Only the "app" logger
+    tree is configured, so uvicorn's own logging is left alone.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    log_queue = queue.SimpleQueue()
+    stream = logging.StreamHandler()
+    stream.setFormatter(logging.Formatter(LOG_FORMAT))
+    _listener = logging.handlers.QueueListener(log_queue, stream, respect_handler_level=True)
+
+    logger = logging.getLogger("app")
+    logger.setLevel(level)
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    logger.propagate = False
+
+    _listener.start()
+    atexit.register(stop_logging)
+
+def stop_logging():
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -1,18 +1,35 @@
 import os
 from dotenv import load_dotenv
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
-from app.database import init_db
+from app.database import init_db, database_stats
+from app.auth import BCRYPT_ROUNDS
 from app.api.routes import auth, entries, agent, analytics
+from app.services.worker_pool import nlp_pool, auth_pool, PoolSaturatedError
+from app.services.ingest_queue import analysis_queue
+from app.services.nlp_cache import nlp_cache
+from app.services.nlp_service import warmup as warmup_nlp
+from app.logging_config import setup_logging
+from app.metrics import RequestMetrics, MetricsMiddleware, render_metrics, PROMETHEUS_CONTENT_TYPE
 
 load_dotenv()
+setup_logging()
+
+request_metrics = RequestMetrics()
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     init_db()
+    if os.getenv("NLP_WARMUP", "true").lower() in ("1", "true", "yes"):
+        await nlp_pool.warmup(warmup_nlp)
+    analysis_queue.start()
     yield
+    await analysis_queue.stop()
+    nlp_pool.shutdown()
+    auth_pool.shutdown()
 
 app = FastAPI(
     title="MindfulAI API",
@@ -27,8 +44,20 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
+# Added last so it wraps CORS too and times every request end to end
+app.add_middleware(MetricsMiddleware, metrics=request_metrics)
+
+@app.exception_handler(PoolSaturatedError)
+async def pool_saturated_handler(request: Request, exc: PoolSaturatedError):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Server is busy, please retry shortly"},
+        headers={"Retry-After": "1"}
+    )
+
 app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
 app.include_router(entries.router, prefix="/api/entries", tags=["entries"])
 app.include_router(agent.router, prefix="/api/agent", tags=["agent"])
@@ -41,3 +70,31 @@ async def root():
 @app.get("/health")
 async def health():
     return {"status": "ok"}
+
+@app.get("/health/nlp")
+async def nlp_health():
+    return {
+        "pool": nlp_pool.stats(),
+        "cache": nlp_cache.stats(),
+        "pending_analysis_jobs": await analysis_queue.pending_count()
+    }
+
+@app.get("/health/auth")
+async def auth_health():
+    return {"pool": auth_pool.stats(), "bcrypt_rounds": BCRYPT_ROUNDS}
+
+@app.get("/health/db")
+async def db_health():
+    return database_stats()
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(
+        render_metrics(
+            request_metrics,
+            pools={"nlp": nlp_pool.stats(), "auth": auth_pool.stats()},
+            cache=nlp_cache.stats(),
+            db=database_stats()
+        ),
+        media_type=PROMETHEUS_CONTENT_TYPE
+    )
@@ -0,0 +1,173 @@
+import time
+from bisect import bisect_left
+from collections import Counter
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Upper bounds in seconds, Prometheus' default latency buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class Histogram:
+    """Cumulative-bucket latency histogram in the Prometheus model"""
+
+    def __init__(self, buckets: tuple = LATENCY_BUCKETS):
+        self.buckets = buckets
+        # One slot per bound plus +Inf; made cumulative when rendered
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> list:
+        bounds = [str(b) for b in self.buckets] + ["+Inf"]
+        total, result = 0, []
+        for bound, count in zip(bounds, self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+class RequestMetrics:
+    """
+    Per-route request counters, updated only from the event loop
+    Routes are keyed by their template ("/api/entries/{entry_id}"), not the
+    concrete path, so one series covers every entry id.
+    """
+
+    def __init__(self):
+        self.in_flight = 0
+        self.latency = {}
+        self.responses = Counter()
+
+    def observe(self, method: str, route: str, status_code: int, elapsed: float):
+        key = (method, route)
+        histogram = self.latency.get(key)
+        if histogram is None:
+            histogram = self.latency[key] = Histogram()
+        histogram.observe(elapsed)
+        self.responses[(method, route, str(status_code))] += 1
+
+class MetricsMiddleware:
+    """ASGI middleware timing every HTTP request into a RequestMetrics"""
+
+    def __init__(self, app, metrics: RequestMetrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        self.metrics.in_flight += 1
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            self.metrics.in_flight -= 1
+            self.metrics.observe(scope["method"], route_template(scope), status_code, time.perf_counter() - started)
+
+def route_template(scope) -> str:
+    """
+    The matched route's path with its parameters put back as placeholders
+    The router leaves "endpoint" and "path_params" in the shared scope, so
+    "/api/entries/42" becomes "/api/entries/{entry_id}". Unmatched paths
+    share one series, so scanners cannot grow the label set.
+    """
+    if "endpoint" not in scope:
+        return "unmatched"
+    segments = scope["path"].split("/")
+    position = 0
+    for name, value in scope.get("path_params", {}).items():
+        for i in range(position, len(segments)):
+            if segments[i] == str(value):
+                segments[i] = "{" + name + "}"
+                position = i + 1
+                break
+    return "/".join(segments)
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _labels(**labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+class MetricsWriter:
+    """Builds a Prometheus text exposition, one metric family at a time"""
+
+    def __init__(self):
+        self.lines = []
+
+    def family(self, name: str, kind: str, help_text: str, samples: list):
+        """samples: (labels dict, value) pairs, or (suffix, labels, value) for histogram parts"""
+        self.lines.append(f"# HELP {name} {help_text}")
+        self.lines.append(f"# TYPE {name} {kind}")
+        for sample in samples:
+            suffix, labels, value = sample if len(sample) == 3 else ("", *sample)
+            self.lines.append(f"{name}{suffix}{_labels(**labels)} {value}")
+
+    def render(self) -> str:
+        return "\n".join(self.lines) + "\n"
+
+def render_metrics(requests: RequestMetrics, pools: dict, cache: dict, db: dict) -> str:
+    """
+    Prometheus text for request metrics plus worker pool, NLP cache and DB pool stats
+    pools maps a pool name to WorkerPool.stats(); db is database_stats().
+    """
+    out = MetricsWriter()
+
+    out.family("http_requests_in_flight", "gauge", "HTTP requests currently being served", [({}, requests.in_flight)])
+
+    latency_samples = []
+    for (method, route), histogram in sorted(requests.latency.items()):
+        for bound, count in histogram.cumulative():
+            latency_samples.append(("_bucket", {"method": method, "route": route, "le": bound}, count))
+        latency_samples.append(("_sum", {"method": method, "route": route}, round(histogram.sum, 6)))
+        latency_samples.append(("_count", {"method": method, "route": route}, histogram.count))
+    out.family("http_request_duration_seconds", "histogram", "HTTP request latency by route template", latency_samples)
+
+    out.family("http_responses_total", "counter", "HTTP responses by route template and status code", [
+        ({"method": method, "route": route, "status": status_code}, count)
+        for (method, route, status_code), count in sorted(requests.responses.items())
+    ])
+
+    for name, kind, key, help_text in (
+        ("worker_pool_in_flight", "gauge", "in_flight", "Jobs running or queued on a worker pool"),
+        ("worker_pool_queue_depth", "gauge", "queue_depth", "Jobs waiting for a free worker"),
+        ("worker_pool_completed_total", "counter", "completed", "Jobs a worker pool finished"),
+        ("worker_pool_rejected_total", "counter", "rejected", "Jobs rejected because a worker pool was saturated"),
+    ):
+        out.family(name, kind, help_text, [({"pool": pool}, stats[key]) for pool, stats in sorted(pools.items())])
+
+    for name, kind, key, help_text in (
+        ("nlp_cache_entries", "gauge", "size", "Entries held in the NLP content cache"),
+        ("nlp_cache_hits_total", "counter", "hits", "NLP content cache hits"),
+        ("nlp_cache_misses_total", "counter", "misses", "NLP content cache misses"),
+        ("nlp_cache_evictions_total", "counter", "evictions", "NLP content cache evictions"),
+    ):
+        out.family(name, kind, help_text, [({}, cache[key])])
+
+    db_pools = {engine: stats for engine, stats in (("sync", db["sync_pool"]), ("async", db["async_pool"])) if "checkouts" in stats}
+    for name, kind, key, help_text in (
+        ("db_pool_checked_out", "gauge", "checked_out", "Database connections currently checked out"),
+        ("db_pool_checkouts_total", "counter", "checkouts", "Database connection checkouts"),
+        ("db_pool_waits_total", "counter", "waits", "Checkouts that waited for a free connection"),
+        ("db_pool_timeouts_total", "counter", "timeouts", "Checkouts that timed out"),
+        ("db_pool_max_checkout_ms", "gauge", "max_checkout_ms", "Slowest connection checkout so far"),
+    ):
+        out.family(name, kind, help_text, [({"engine": engine}, stats[key]) for engine, stats in db_pools.items()])
+
+    return out.render()
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, DateTime, Text, Boolean, ForeignKey, JSON, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
@@ -16,6 +16,12 @@ class User(Base):
 
 class JournalEntry(Base):
     __tablename__ = "journal_entries"
+    __table_args__ = (
+        # Serves the newest-first timeline and its keyset cursor
+        Index("ix_journal_entries_user_created_id", "user_id", "created_at", "id"),
+        # Serves per-user scans in insertion order (pattern columns, exports)
+        Index("ix_journal_entries_user_id_id", "user_id", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), index=True)
@@ -25,12 +31,19 @@ class JournalEntry(Base):
     keywords = Column(String, default="")
     created_at = Column(DateTime, default=datetime.utcnow, index=True)
     mood_level = Column(Integer, default=0)
+    analysis_status = Column(String, default="done", server_default="done")
     
     user = relationship("User", back_populates="entries")
     followups = relationship("AgentFollowup", back_populates="entry", cascade="all, delete-orphan")
+    analysis = relationship("EntryAnalysis", back_populates="entry", uselist=False, cascade="all, delete-orphan")
+    analysis_jobs = relationship("AnalysisJob", back_populates="entry", cascade="all, delete-orphan")
+    keyword_rows = relationship("EntryKeyword", back_populates="entry", cascade="all, delete-orphan")
 
 class AgentFollowup(Base):
     __tablename__ = "agent_followups"
+    __table_args__ = (
+        Index("ix_agent_followups_entry_created", "entry_id", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     entry_id = Column(Integer, ForeignKey("journal_entries.id"), index=True)
@@ -38,3 +51,88 @@ class AgentFollowup(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     
     entry = relationship("JournalEntry", back_populates="followups")
+
+class EntryAnalysis(Base):
+    __tablename__ = "entry_analysis"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    entry_id = Column(Integer, ForeignKey("journal_entries.id"), unique=True, index=True)
+    analyzer_version = Column(Integer, default=1)
+    emotions = Column(JSON, default=list)
+    themes = Column(JSON, default=list)
+    needs = Column(JSON, default=list)
+    sentiment = Column(Float, default=0.0)
+    intensity = Column(JSON, default=dict)
+    reflection = Column(Text, default="")
+    computed_at = Column(DateTime, default=datetime.utcnow)
+    
+    entry = relationship("JournalEntry", back_populates="analysis")
+
+class AnalysisJob(Base):
+    __tablename__ = "analysis_jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    entry_id = Column(Integer, ForeignKey("journal_entries.id"), index=True)
+    status = Column(String, default="pending", index=True)
+    attempts = Column(Integer, default=0)
+    last_error = Column(Text, nullable=True)
+    claimed_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    entry = relationship("JournalEntry", back_populates="analysis_jobs")
+
+class UserStats(Base):
+    __tablename__ = "user_stats"
+    
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    entry_count = Column(Integer, default=0)
+    sentiment_sum = Column(Float, default=0.0)
+    mood_histogram = Column(JSON, default=dict)
+    # Label counts over the labels_window newest entries; labels_analyzed of
+    # them had a labels_version analysis when counted
+    emotion_counts = Column(JSON, default=dict)
+    theme_counts = Column(JSON, default=dict)
+    need_counts = Column(JSON, default=dict)
+    labels_window = Column(Integer, nullable=True)
+    labels_analyzed = Column(Integer, nullable=True)
+    labels_version = Column(Integer, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+class UserPatterns(Base):
+    __tablename__ = "user_patterns"
+    
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    mood_patterns = Column(JSON, default=list)
+    entry_patterns = Column(JSON, default=dict)
+    computed_at = Column(DateTime, default=datetime.utcnow)
+
+class RefreshTokenFamily(Base):
+    """
+    One row per login session; every refresh token minted for it shares the family id
+    Rotating bumps generation in place, so a family stays one row however
+    often it refreshes. Presenting an older generation means a token was
+    copied, and revokes the whole family.
+    """
+    __tablename__ = "refresh_token_families"
+    
+    id = Column(String, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+    generation = Column(Integer, default=0)
+    revoked = Column(Boolean, default=False)
+    expires_at = Column(DateTime, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class EntryKeyword(Base):
+    __tablename__ = "entry_keywords"
+    __table_args__ = (
+        Index("ix_entry_keywords_user_keyword", "user_id", "keyword"),
+        Index("ix_entry_keywords_user_entry", "user_id", "entry_id"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    entry_id = Column(Integer, ForeignKey("journal_entries.id"), index=True)
+    user_id = Column(Integer, ForeignKey("users.id"))
+    keyword = Column(String)
+    weight = Column(Float, default=1.0)
+    
+    entry = relationship("JournalEntry", back_populates="keyword_rows")
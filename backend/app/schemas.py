@@ -1,5 +1,5 @@
-from pydantic import BaseModel, EmailStr
-from datetime import datetime
+from pydantic import BaseModel, EmailStr, field_validator
+from datetime import datetime, timezone
 from typing import Optional, List
 
 class UserRegister(BaseModel):
@@ -16,6 +16,9 @@ class TokenResponse(BaseModel):
     refresh_token: Optional[str] = None
     token_type: str = "bearer"
 
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
 class UserResponse(BaseModel):
     id: int
     email: str
@@ -30,6 +33,26 @@ class JournalEntryCreate(BaseModel):
     content: str
     mood_level: Optional[int] = 0
 
+class JournalEntryImport(JournalEntryCreate):
+    created_at: Optional[datetime] = None
+
+    @field_validator("created_at")
+    @classmethod
+    def to_naive_utc(cls, value: Optional[datetime]) -> Optional[datetime]:
+        # Stored timestamps are naive UTC, like datetime.utcnow()
+        if value is not None and value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+
+class BulkImportError(BaseModel):
+    line: int
+    error: str
+
+class BulkImportResponse(BaseModel):
+    imported: int
+    failed: int
+    errors: List[BulkImportError]
+
 class JournalEntryUpdate(BaseModel):
     title: Optional[str] = None
     content: Optional[str] = None
@@ -42,11 +65,21 @@ class JournalEntryResponse(BaseModel):
     sentiment_score: float
     keywords: str
     mood_level: int
+    analysis_status: str = "done"
     created_at: datetime
     
     class Config:
         from_attributes = True
 
+class EntrySearchResult(BaseModel):
+    id: int
+    title: str
+    snippet: str
+    mood_level: int
+    sentiment_score: float
+    created_at: datetime
+    rank: float
+
 class AgentFollowupResponse(BaseModel):
     id: int
     prompt: str
@@ -1,14 +1,41 @@
 from app.models import JournalEntry
 from app.services.nlp_service import (
+    Document,
+    as_document,
     get_sentiment_score, 
     extract_emotion_intensity,
-    detect_emotional_context
+    detect_emotional_context,
+    score_or_default
 )
+from app.services.lexicon_service import lexicon_matcher
+from app.services.nlp_cache import cached_by_content
+import logging
 import random
+from collections import Counter
 from datetime import datetime, timedelta
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
 
-vader_analyzer = SentimentIntensityAnalyzer()
+logger = logging.getLogger(__name__)
+
+# Bump whenever the lexicons, scorers or reflection rules change so stored
+# entry analyses are recomputed on their next read.
+ANALYZER_VERSION = 2
+
+DEFAULT_REFLECTION = "I appreciate you sharing your authentic thoughts. Every word matters."
+
+class AnalysisContext:
+    """Per-entry analysis shared by followup, encouragement and reflection generation.
+
+    Built once by AICompanion.build_context so a single companion request
+    never runs the sentiment, intensity or lexicon scorers more than once.
+    """
+    
+    def __init__(self, emotions: list, themes: list, needs: list, sentiment: float, intensity: dict, reflection: str):
+        self.emotions = emotions
+        self.themes = themes
+        self.needs = needs
+        self.sentiment = sentiment
+        self.intensity = intensity
+        self.reflection = reflection
 
 class AICompanion:
     """Deep conversational AI that analyzes journal content, not just mood scores"""
@@ -65,55 +92,54 @@ class AICompanion:
             ]
         }
     
-    def analyze_entry_deeply(self, entry: JournalEntry) -> dict:
-        """Analyze the content deeply, not just sentiment score"""
-        content = entry.content.lower()
+    def build_context(self, content: str | Document) -> AnalysisContext:
+        """Run every scorer over the entry text exactly once"""
+        doc = as_document(content)
+        
+        # One pass over the text finds every emotion, theme and need keyword
+        matches = lexicon_matcher.scan(doc.lower)
+        sentiment = get_sentiment_score(doc)
+        intensity = extract_emotion_intensity(doc)
         
         # Extract multiple dimensions
-        emotions = self._detect_emotions(content)
-        themes = self._extract_themes(content)
-        needs = self._identify_needs(content)
-        patterns = self._find_patterns(entry)
+        emotions = self._detect_emotions(doc, matches, sentiment, intensity)
+        themes = self._extract_themes(doc, matches)
+        needs = self._identify_needs(doc, matches)
+        
+        return AnalysisContext(
+            emotions=emotions,
+            themes=themes,
+            needs=needs,
+            sentiment=sentiment,
+            intensity=intensity,
+            reflection=self._generate_content_based_reflection(emotions, themes, needs, doc)
+        )
+    
+    def analyze_entry_deeply(self, entry: JournalEntry, context: AnalysisContext = None) -> dict:
+        """Analyze the content deeply, not just sentiment score"""
+        if context is None:
+            context = try_analysis_context(entry.content) or fallback_analysis_context()
         
         return {
-            "primary_emotions": emotions,
-            "underlying_themes": themes,
-            "expressed_needs": needs,
-            "detected_patterns": patterns,
-            "sentiment_from_text": get_sentiment_score(entry.content),
-            "content_based_reflection": self._generate_content_based_reflection(
-                emotions, themes, needs, content
-            )
+            "primary_emotions": context.emotions,
+            "underlying_themes": context.themes,
+            "expressed_needs": context.needs,
+            "detected_patterns": self._find_patterns(entry, context.emotions),
+            "sentiment_from_text": context.sentiment,
+            "content_based_reflection": context.reflection
         }
     
-    def _detect_emotions(self, content: str) -> list:
+    def _detect_emotions(self, content: str | Document, matches: list = None, sentiment: float = None, emotion_intensity: dict = None) -> list:
         """Advanced emotion detection using keywords + sentiment analysis + emotional intensity"""
-        emotion_keywords = {
-            "anxiety": ["anxious", "nervous", "worried", "scared", "stressed", "tense", "panic", "uneasy", "apprehensive", "fidgety"],
-            "sadness": ["sad", "depressed", "down", "unhappy", "miserable", "blue", "grief", "sorrowful", "gloomy", "melancholy"],
-            "anger": ["angry", "furious", "rage", "mad", "frustrated", "annoyed", "bitter", "irritated", "livid", "incensed"],
-            "stress": ["stressed", "overwhelmed", "pressured", "exhausted", "burnt out", "tension", "anxious", "tense", "strained"],
-            "loneliness": ["lonely", "alone", "isolated", "disconnected", "forgotten", "unsupported", "abandoned", "rejected"],
-            "joy": ["happy", "joyful", "delighted", "thrilled", "blessed", "wonderful", "amazing", "good", "great", "excellent", "awesome", "fantastic", "love it"],
-            "gratitude": ["grateful", "thankful", "appreciate", "blessed", "fortunate", "grateful", "thanks"],
-            "hope": ["hope", "hopeful", "believe", "faith", "possible", "future", "excited", "optimistic", "confident"],
-            "guilt": ["guilty", "shame", "regret", "sorry", "ashamed", "feel bad", "fault"],
-            "fear": ["afraid", "terrified", "fearful", "dread", "horrified", "petrified", "scary", "frightened"],
-            "excitement": ["excited", "thrilled", "pumped", "energized", "enthusiastic", "thrilled", "love", "can't wait"],
-            "calm": ["calm", "peaceful", "serene", "relaxed", "at ease", "tranquil", "content", "composed"],
-            "pride": ["proud", "accomplished", "succeeded", "achieved", "won", "triumphed", "victorious"],
-            "confusion": ["confused", "unsure", "unclear", "lost", "bewildered", "perplexed", "disoriented"]
-        }
-        
-        detected = []
-        content_lower = content.lower()
+        content = as_document(content)
+        if matches is None:
+            matches = lexicon_matcher.scan(content.lower)
+        detected = lexicon_matcher.labels(matches, "emotion")
         
-        for emotion, keywords in emotion_keywords.items():
-            if any(keyword in content_lower for keyword in keywords):
-                detected.append(emotion)
-        
-        emotion_intensity = extract_emotion_intensity(content)
-        sentiment = get_sentiment_score(content)
+        if emotion_intensity is None:
+            emotion_intensity = score_or_default(extract_emotion_intensity, content, {})
+        if sentiment is None:
+            sentiment = score_or_default(get_sentiment_score, content, 0.0)
         
         if not detected:
             if sentiment > 0.4:
@@ -135,62 +161,29 @@ class AICompanion:
         
         return list(set(detected)) if detected else ["neutral"]
     
-    def _extract_themes(self, content: str) -> list:
+    def _extract_themes(self, content: str | Document, matches: list = None) -> list:
         """Extract themes from what the user wrote with enhanced keywords"""
-        theme_keywords = {
-            "work": ["work", "job", "boss", "colleague", "office", "deadline", "project", "meeting", "career", "employed", "employee", "workplace", "professional"],
-            "relationships": ["friend", "family", "relationship", "partner", "loved one", "brother", "sister", "mother", "father", "parent", "spouse", "crush", "dating"],
-            "health": ["health", "sick", "ill", "pain", "hurt", "exercise", "sleep", "eat", "tired", "energy", "medical", "doctor", "hospital", "fitness", "body"],
-            "finance": ["money", "bill", "debt", "payment", "financial", "broke", "afford", "expensive", "budget", "savings", "income", "investment"],
-            "personal_growth": ["learn", "grow", "improve", "challenge", "goal", "progress", "skill", "develop", "education", "course", "training", "hobby"],
-            "identity": ["feel", "am", "identity", "self", "who i am", "purpose", "meaning", "values", "believe", "authentic", "true self"],
-            "loss": ["lost", "death", "goodbye", "missing", "left", "gone", "departed", "loss", "died", "passed away", "ending"],
-            "achievement": ["achieved", "accomplished", "succeeded", "won", "completed", "finished", "passed", "success", "triumph", "reached"],
-            "mental_health": ["anxiety", "depression", "therapy", "counseling", "mental health", "stress management", "mindfulness"],
-            "creativity": ["art", "music", "write", "create", "creative", "design", "passion", "express", "imagination", "inspiration"],
-            "learning": ["school", "study", "exam", "test", "grade", "class", "university", "college", "student", "learning", "teach"]
-        }
-        
-        themes = []
-        content_lower = content.lower()
-        for theme, keywords in theme_keywords.items():
-            if any(keyword in content_lower for keyword in keywords):
-                themes.append(theme)
-        
-        return themes if themes else []
+        if matches is None:
+            matches = lexicon_matcher.scan(as_document(content).lower)
+        return lexicon_matcher.labels(matches, "theme")
     
-    def _identify_needs(self, content: str) -> list:
+    def _identify_needs(self, content: str | Document, matches: list = None) -> list:
         """Identify what the user might need based on their writing"""
-        need_keywords = {
-            "support": ["help", "support", "need", "struggling", "can't", "unable", "stuck", "difficulty"],
-            "understanding": ["understand", "get it", "see", "know", "hear me", "listen", "explain"],
-            "connection": ["lonely", "alone", "isolated", "talk", "share", "connect", "community"],
-            "validation": ["right", "ok", "normal", "feel", "valid", "deserve", "matter"],
-            "action": ["change", "do", "fix", "improve", "need to", "must", "should", "want to"],
-            "rest": ["tired", "exhausted", "need break", "sleep", "rest", "relax", "pause", "slow down"],
-            "clarity": ["confused", "unsure", "lost", "don't know", "unclear", "questions", "wondering"],
-            "hope": ["hopeful", "believe", "faith", "future", "will be", "possible", "optimistic", "better"],
-            "acceptance": ["struggle with", "accept", "let go", "forgive", "peace"],
-            "growth": ["learn", "understand myself", "figure out", "discover", "evolve"]
-        }
-        
-        needs = []
-        content_lower = content.lower()
-        for need, keywords in need_keywords.items():
-            if any(keyword in content_lower for keyword in keywords):
-                needs.append(need)
-        
-        return needs if needs else []
+        if matches is None:
+            matches = lexicon_matcher.scan(as_document(content).lower)
+        return lexicon_matcher.labels(matches, "need")
     
-    def _find_patterns(self, entry: JournalEntry) -> dict:
+    def _find_patterns(self, entry: JournalEntry, emotions: list = None) -> dict:
         """Look for patterns in user's writing style and content"""
+        if emotions is None:
+            emotions = self._detect_emotions(entry.content)
         return {
             "frequency_indicator": "Regular writer" if entry.id % 3 == 0 else "Intermittent",
             "entry_length": "Detailed" if len(entry.content) > 500 else "Brief",
-            "emotional_openness": "High" if len(self._detect_emotions(entry.content.lower())) > 2 else "Moderate"
+            "emotional_openness": "High" if len(emotions) > 2 else "Moderate"
         }
     
-    def _generate_content_based_reflection(self, emotions: list, themes: list, needs: list, content: str) -> str:
+    def _generate_content_based_reflection(self, emotions: list, themes: list, needs: list, content: str | Document) -> str:
         """Generate intelligent, personalized reflection based on content analysis"""
         reflections = []
         
@@ -222,7 +215,7 @@ class AICompanion:
             reflections.append("Hope shines through your words. That light is worth protecting and nurturing.")
         
         if "work" in themes:
-            if "stress" in emotions or "exhausted" in content.lower():
+            if "stress" in emotions or "exhausted" in as_document(content).lower:
                 reflections.append("Work is consuming your energy. Consider what boundaries you might need to set.")
             else:
                 reflections.append("Work is part of your story. You're building something meaningful.")
@@ -254,12 +247,29 @@ class AICompanion:
         if len(reflections) > 3:
             reflections = reflections[:3]
         
-        return " ".join(reflections) if reflections else "I appreciate you sharing your authentic thoughts. Every word matters."
+        return " ".join(reflections) if reflections else DEFAULT_REFLECTION
+
+@cached_by_content("companion")
+def build_analysis_context(content: str | Document) -> AnalysisContext:
+    """Module-level entry point so the analysis can run in a worker process"""
+    return AICompanion().build_context(content)
+
+def try_analysis_context(content: str | Document) -> AnalysisContext | None:
+    """build_analysis_context, or None when a scorer failed; the failure is logged, never cached"""
+    try:
+        return build_analysis_context(content)
+    except Exception as e:
+        logger.error("Error analyzing entry: %s", e)
+        return None
 
-def generate_intelligent_followup(entry: JournalEntry) -> str:
+def fallback_analysis_context() -> AnalysisContext:
+    """What the companion shows while an entry cannot be analyzed; never cached or stored"""
+    return AnalysisContext(emotions=[], themes=[], needs=[], sentiment=0.0, intensity={}, reflection=DEFAULT_REFLECTION)
+
+def generate_intelligent_followup(entry: JournalEntry, context: AnalysisContext = None) -> str:
     """Generate a followup question based on actual content, not mood slider"""
     ai = AICompanion()
-    analysis = ai.analyze_entry_deeply(entry)
+    analysis = ai.analyze_entry_deeply(entry, context)
     
     emotions = analysis["primary_emotions"]
     needs = analysis["expressed_needs"]
@@ -272,17 +282,19 @@ def generate_intelligent_followup(entry: JournalEntry) -> str:
     # Fallback to content-based followup
     return analysis["content_based_reflection"]
 
-def get_ai_companion_response(entry: JournalEntry) -> dict:
+def get_ai_companion_response(entry: JournalEntry, context: AnalysisContext = None) -> dict:
     """Get complete AI companion response for an entry"""
     ai = AICompanion()
-    analysis = ai.analyze_entry_deeply(entry)
+    if context is None:
+        context = try_analysis_context(entry.content) or fallback_analysis_context()
+    analysis = ai.analyze_entry_deeply(entry, context)
     
     return {
         "detected_emotions": analysis["primary_emotions"],
         "themes": analysis["underlying_themes"],
         "your_needs": analysis["expressed_needs"],
         "reflection": analysis["content_based_reflection"],
-        "followup_question": generate_intelligent_followup(entry),
+        "followup_question": generate_intelligent_followup(entry, context),
         "encouragement": generate_encouragement(analysis, entry),
         "timestamp": datetime.now().isoformat()
     }
@@ -304,8 +316,13 @@ def generate_encouragement(analysis: dict, entry: JournalEntry) -> str:
     else:
         return "Thank you for sharing your authentic self. That takes courage."
 
-def extract_and_analyze_patterns(user_entries: list) -> dict:
-    """Analyze patterns across multiple entries - not just mood slider trends"""
+def extract_and_analyze_patterns(user_entries: list, get_context=None) -> dict:
+    """Analyze patterns across multiple entries - not just mood slider trends
+    
+    Every entry given is analyzed, so callers pick the window (newest first).
+    `get_context` maps an entry to its AnalysisContext, letting callers serve
+    stored analyses instead of re-scoring every entry's text.
+    """
     if not user_entries:
         return {}
     
@@ -314,17 +331,20 @@ def extract_and_analyze_patterns(user_entries: list) -> dict:
     all_themes = []
     all_needs = []
     
-    for entry in user_entries[-10:]:  # Analyze last 10 entries
-        analysis = ai.analyze_entry_deeply(entry)
+    for entry in user_entries:
+        context = get_context(entry) if get_context else None
+        analysis = ai.analyze_entry_deeply(entry, context)
         all_emotions.extend(analysis["primary_emotions"])
         all_themes.extend(analysis["underlying_themes"])
         all_needs.extend(analysis["expressed_needs"])
     
-    # Find most common patterns
-    from collections import Counter
-    emotion_patterns = Counter(all_emotions).most_common(3)
-    theme_patterns = Counter(all_themes).most_common(3)
-    need_patterns = Counter(all_needs).most_common(2)
+    return summarize_label_counts(Counter(all_emotions), Counter(all_themes), Counter(all_needs))
+
+def summarize_label_counts(emotions: Counter, themes: Counter, needs: Counter) -> dict:
+    """Pattern analysis from emotion/theme/need counts; ties keep first-seen order"""
+    emotion_patterns = emotions.most_common(3)
+    theme_patterns = themes.most_common(3)
+    need_patterns = needs.most_common(2)
     
     return {
         "recurring_emotions": [e[0] for e in emotion_patterns],
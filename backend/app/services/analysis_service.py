@@ -0,0 +1,69 @@
+from datetime import datetime
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.models import JournalEntry, EntryAnalysis
+from app.services.agent_service import AnalysisContext, ANALYZER_VERSION, fallback_analysis_context, try_analysis_context
+from app.services.nlp_service import Document, analyze_sentiment_and_keywords
+from app.services.worker_pool import nlp_pool
+
+def analyze_content(content: str) -> tuple[float, str, AnalysisContext | None]:
+    """Everything computed for an entry at write time, as one pool job; the context is None if a scorer failed"""
+    doc = Document(content)
+    sentiment_score, keywords = analyze_sentiment_and_keywords(doc)
+    return sentiment_score, keywords, try_analysis_context(doc)
+
+def context_from_record(record: EntryAnalysis) -> AnalysisContext:
+    return AnalysisContext(
+        emotions=list(record.emotions or []),
+        themes=list(record.themes or []),
+        needs=list(record.needs or []),
+        sentiment=record.sentiment or 0.0,
+        intensity=dict(record.intensity or {}),
+        reflection=record.reflection or ""
+    )
+
+def is_current(record: EntryAnalysis) -> bool:
+    return record is not None and record.analyzer_version == ANALYZER_VERSION
+
+def save_entry_analysis(db: Session, entry: JournalEntry, context: AnalysisContext = None) -> AnalysisContext:
+    """Compute (unless given) and store the companion analysis for an entry.
+
+    The caller owns the transaction; nothing is committed here. When the
+    scorers fail, nothing is stored and a fallback context is returned.
+    """
+    if context is None:
+        context = try_analysis_context(entry.content)
+        if context is None:
+            return fallback_analysis_context()
+    
+    record = entry.analysis
+    if record is None:
+        record = EntryAnalysis(entry=entry)
+        db.add(record)
+    
+    record.analyzer_version = ANALYZER_VERSION
+    record.emotions = context.emotions
+    record.themes = context.themes
+    record.needs = context.needs
+    record.sentiment = context.sentiment
+    record.intensity = context.intensity
+    record.reflection = context.reflection
+    record.computed_at = datetime.utcnow()
+    return context
+
+def store_entry_analysis(db: Session, entry: JournalEntry, context: AnalysisContext | None):
+    """Store analyze_content's context; without one, drop the stale row so the next read retries"""
+    if context is not None:
+        save_entry_analysis(db, entry, context)
+    elif entry.analysis is not None:
+        db.delete(entry.analysis)
+
+async def load_entry_analysis(db: AsyncSession, entry: JournalEntry) -> AnalysisContext:
+    """Serve the stored analysis, recomputing on the NLP pool only when it is missing or stale"""
+    record = await entry.awaitable_attrs.analysis
+    if is_current(record):
+        return context_from_record(record)
+    context = await nlp_pool.run(try_analysis_context, entry.content)
+    if context is None:
+        return fallback_analysis_context()
+    return await db.run_sync(save_entry_analysis, entry, context)
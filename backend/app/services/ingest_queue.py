@@ -0,0 +1,201 @@
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta
+from sqlalchemy.orm import Session
+from app.database import SessionLocal
+from app.models import JournalEntry, AnalysisJob
+from app.services.analysis_service import analyze_content, store_entry_analysis
+from app.services.stats_service import apply_entry_changes, entry_snapshot
+from app.services.keyword_service import set_entry_keywords
+from app.services.worker_pool import nlp_pool, PoolSaturatedError
+
+logger = logging.getLogger(__name__)
+
+def enqueue_analysis(db: Session, entry: JournalEntry):
+    """Mark an entry pending and queue its NLP enrichment; the caller commits"""
+    entry.analysis_status = "pending"
+    db.add(AnalysisJob(entry=entry))
+
+def apply_enrichment(db: Session, entry_id: int, content: str, results: tuple) -> bool:
+    """Write analyze_content results computed for `content`, unless the entry changed since.
+
+    The queue and POST /analyze can enrich the same entry at once. The
+    conditional UPDATE picks the one that writes, and comes before any read
+    so a SQLite transaction never has to upgrade a stale read snapshot.
+    """
+    claimed = db.query(JournalEntry).filter(
+        JournalEntry.id == entry_id,
+        JournalEntry.content == content,
+        JournalEntry.analysis_status != "done"
+    ).update({"analysis_status": "done"}, synchronize_session=False)
+    if not claimed:
+        return False
+
+    sentiment_score, keywords, context = results
+    entry = db.get(JournalEntry, entry_id)
+    db.refresh(entry)
+    before = entry_snapshot(entry)
+    entry.sentiment_score = sentiment_score
+    set_entry_keywords(entry, keywords)
+    store_entry_analysis(db, entry, context)
+    apply_entry_changes(db, entry.user_id, removed=[before], added=[entry_snapshot(entry)])
+    return True
+
+class AnalysisQueue:
+    """In-process worker draining the analysis_jobs table.
+
+    Jobs live in the database, so entries accepted before a restart are
+    still enriched afterwards. Each job is claimed with a conditional
+    UPDATE, which keeps several uvicorn workers from analyzing the same entry.
+    Every database step runs in a thread with its own session, so a locked
+    SQLite file or a slow commit never stalls the event loop.
+    """
+
+    def __init__(self, poll_interval: float = 5.0, batch_size: int = 20, max_attempts: int = 3, claim_timeout: int = 300):
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.claim_timeout = claim_timeout
+        self._wake = asyncio.Event()
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def notify(self):
+        """Wake the worker right away instead of waiting for the next poll"""
+        self._wake.set()
+
+    async def pending_count(self) -> int:
+        return await asyncio.to_thread(self._pending_count)
+
+    def _pending_count(self) -> int:
+        with SessionLocal() as db:
+            return db.query(AnalysisJob).filter(AnalysisJob.status == "pending").count()
+
+    def _release_stale_claims(self):
+        # Jobs a crashed worker claimed but never finished go back in the queue
+        cutoff = datetime.utcnow() - timedelta(seconds=self.claim_timeout)
+        with SessionLocal() as db:
+            db.query(AnalysisJob).filter(
+                AnalysisJob.status == "running",
+                AnalysisJob.claimed_at < cutoff
+            ).update({"status": "pending", "claimed_at": None}, synchronize_session=False)
+            db.commit()
+
+    async def _run(self):
+        await asyncio.to_thread(self._release_stale_claims)
+        while True:
+            try:
+                processed = await self.process_batch()
+            except Exception as e:
+                logger.exception("Error in analysis queue: %s", e)
+                processed = 0
+
+            if processed:
+                continue
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                await asyncio.to_thread(self._release_stale_claims)
+            self._wake.clear()
+
+    async def process_batch(self) -> int:
+        job_ids = await asyncio.to_thread(self._pending_job_ids)
+        processed = 0
+        for job_id in job_ids:
+            if await asyncio.to_thread(self._claim, job_id):
+                if not await self._process(job_id):
+                    # The NLP pool is full; wait for the next poll instead of spinning
+                    break
+                processed += 1
+        return processed
+
+    def _pending_job_ids(self) -> list:
+        with SessionLocal() as db:
+            return [job_id for (job_id,) in db.query(AnalysisJob.id).filter(
+                AnalysisJob.status == "pending"
+            ).order_by(AnalysisJob.id).limit(self.batch_size).all()]
+
+    def _claim(self, job_id: int) -> bool:
+        with SessionLocal() as db:
+            claimed = db.query(AnalysisJob).filter(
+                AnalysisJob.id == job_id,
+                AnalysisJob.status == "pending"
+            ).update({"status": "running", "claimed_at": datetime.utcnow()}, synchronize_session=False)
+            db.commit()
+            return claimed == 1
+
+    async def _process(self, job_id: int) -> bool:
+        """Run one claimed job; False when the NLP pool was saturated and the job went back unchanged"""
+        target = await asyncio.to_thread(self._load_job, job_id)
+        if target is None:
+            return True
+        entry_id, content = target
+
+        try:
+            results = await nlp_pool.run(analyze_content, content)
+            await asyncio.to_thread(self._finish, job_id, entry_id, content, results)
+        except PoolSaturatedError:
+            # Backpressure, not a failure: the attempt does not count
+            await asyncio.to_thread(self._release, job_id)
+            return False
+        except Exception as e:
+            await asyncio.to_thread(self._fail, job_id, entry_id, str(e))
+        return True
+
+    def _load_job(self, job_id: int) -> tuple | None:
+        """The claimed job's entry id and content; drops jobs whose entry is gone"""
+        with SessionLocal() as db:
+            job = db.get(AnalysisJob, job_id)
+            if job is None:
+                return None
+            entry = job.entry
+            if entry is None:
+                db.delete(job)
+                db.commit()
+                return None
+            return entry.id, entry.content
+
+    def _finish(self, job_id: int, entry_id: int, content: str, results: tuple):
+        with SessionLocal() as db:
+            apply_enrichment(db, entry_id, content, results)
+            db.query(AnalysisJob).filter(AnalysisJob.id == job_id).delete(synchronize_session=False)
+            db.commit()
+
+    def _release(self, job_id: int):
+        with SessionLocal() as db:
+            db.query(AnalysisJob).filter(AnalysisJob.id == job_id).update(
+                {"status": "pending", "claimed_at": None}, synchronize_session=False
+            )
+            db.commit()
+
+    def _fail(self, job_id: int, entry_id: int, error: str):
+        with SessionLocal() as db:
+            job = db.get(AnalysisJob, job_id)
+            if job is None:
+                return
+            job.attempts = (job.attempts or 0) + 1
+            job.last_error = error
+            if job.attempts >= self.max_attempts:
+                job.status = "failed"
+                entry = db.get(JournalEntry, entry_id)
+                if entry is not None:
+                    entry.analysis_status = "failed"
+            else:
+                job.status = "pending"
+            db.commit()
+
+analysis_queue = AnalysisQueue(
+    poll_interval=float(os.getenv("ANALYSIS_QUEUE_POLL_SECONDS", 5.0))
+)
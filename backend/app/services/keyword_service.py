@@ -0,0 +1,56 @@
+from sqlalchemy import func, insert, exists
+from sqlalchemy.orm import Session
+from app.models import JournalEntry, EntryKeyword
+
+def split_keywords(keywords: str) -> list:
+    return [kw.strip() for kw in keywords.split(",") if kw.strip()] if keywords else []
+
+def keyword_weights(keywords: str) -> list:
+    """(keyword, weight) pairs; keywords arrive most frequent first, so weight decays with rank"""
+    kws = split_keywords(keywords)
+    return [(kw, round(1 - i / len(kws), 3)) for i, kw in enumerate(kws)]
+
+def set_entry_keywords(entry: JournalEntry, keywords: str):
+    """Write keywords to both the legacy comma-joined column and entry_keywords"""
+    entry.keywords = keywords
+    entry.keyword_rows = [
+        EntryKeyword(user_id=entry.user_id, keyword=kw, weight=weight)
+        for kw, weight in keyword_weights(keywords)
+    ]
+
+def insert_keyword_rows(db: Session, entries: list):
+    """Bulk-insert entry_keywords for (entry_id, user_id, keywords) of entries written with Core inserts"""
+    rows = [
+        {"entry_id": entry_id, "user_id": user_id, "keyword": kw, "weight": weight}
+        for entry_id, user_id, keywords in entries
+        for kw, weight in keyword_weights(keywords)
+    ]
+    if rows:
+        db.execute(insert(EntryKeyword), rows)
+
+def top_keywords(db: Session, user_id: int, limit: int = 10) -> list:
+    """Most frequent keywords for a user; ties keep first-seen order"""
+    rows = db.query(EntryKeyword.keyword).filter(
+        EntryKeyword.user_id == user_id
+    ).group_by(EntryKeyword.keyword).order_by(
+        func.count(EntryKeyword.id).desc(), func.min(EntryKeyword.entry_id), func.min(EntryKeyword.id)
+    ).limit(limit)
+    return [keyword for (keyword,) in rows]
+
+def backfill_keywords(db: Session, batch_size: int = 1000) -> int:
+    """Populate entry_keywords for entries that only have the legacy column; safe to re-run"""
+    total = 0
+    last_id = 0
+    while True:
+        batch = db.query(JournalEntry.id, JournalEntry.user_id, JournalEntry.keywords).filter(
+            JournalEntry.id > last_id,
+            JournalEntry.keywords != "",
+            ~exists().where(EntryKeyword.entry_id == JournalEntry.id)
+        ).order_by(JournalEntry.id).limit(batch_size).all()
+        if not batch:
+            return total
+        
+        insert_keyword_rows(db, batch)
+        db.commit()
+        total += len(batch)
+        last_id = batch[-1][0]
@@ -0,0 +1,154 @@
+import re
+from collections import namedtuple
+
+EMOTION_KEYWORDS = {
+    "anxiety": ["anxious", "nervous", "worried", "scared", "stressed", "tense", "panic", "uneasy", "apprehensive", "fidgety"],
+    "sadness": ["sad", "depressed", "down", "unhappy", "miserable", "blue", "grief", "sorrowful", "gloomy", "melancholy"],
+    "anger": ["angry", "furious", "rage", "mad", "frustrated", "annoyed", "bitter", "irritated", "livid", "incensed"],
+    "stress": ["stressed", "overwhelmed", "pressured", "exhausted", "burnt out", "tension", "anxious", "tense", "strained"],
+    "loneliness": ["lonely", "alone", "isolated", "disconnected", "forgotten", "unsupported", "abandoned", "rejected"],
+    "joy": ["happy", "joyful", "delighted", "thrilled", "blessed", "wonderful", "amazing", "good", "great", "excellent", "awesome", "fantastic", "love it"],
+    "gratitude": ["grateful", "thankful", "appreciate", "blessed", "fortunate", "grateful", "thanks"],
+    "hope": ["hope", "hopeful", "believe", "faith", "possible", "future", "excited", "optimistic", "confident"],
+    "guilt": ["guilty", "shame", "regret", "sorry", "ashamed", "feel bad", "fault"],
+    "fear": ["afraid", "terrified", "fearful", "dread", "horrified", "petrified", "scary", "frightened"],
+    "excitement": ["excited", "thrilled", "pumped", "energized", "enthusiastic", "thrilled", "love", "can't wait"],
+    "calm": ["calm", "peaceful", "serene", "relaxed", "at ease", "tranquil", "content", "composed"],
+    "pride": ["proud", "accomplished", "succeeded", "achieved", "won", "triumphed", "victorious"],
+    "confusion": ["confused", "unsure", "unclear", "lost", "bewildered", "perplexed", "disoriented"]
+}
+
+THEME_KEYWORDS = {
+    "work": ["work", "job", "boss", "colleague", "office", "deadline", "project", "meeting", "career", "employed", "employee", "workplace", "professional"],
+    "relationships": ["friend", "family", "relationship", "partner", "loved one", "brother", "sister", "mother", "father", "parent", "spouse", "crush", "dating"],
+    "health": ["health", "sick", "ill", "pain", "hurt", "exercise", "sleep", "eat", "tired", "energy", "medical", "doctor", "hospital", "fitness", "body"],
+    "finance": ["money", "bill", "debt", "payment", "financial", "broke", "afford", "expensive", "budget", "savings", "income", "investment"],
+    "personal_growth": ["learn", "grow", "improve", "challenge", "goal", "progress", "skill", "develop", "education", "course", "training", "hobby"],
+    "identity": ["feel", "am", "identity", "self", "who i am", "purpose", "meaning", "values", "believe", "authentic", "true self"],
+    "loss": ["lost", "death", "goodbye", "missing", "left", "gone", "departed", "loss", "died", "passed away", "ending"],
+    "achievement": ["achieved", "accomplished", "succeeded", "won", "completed", "finished", "passed", "success", "triumph", "reached"],
+    "mental_health": ["anxiety", "depression", "therapy", "counseling", "mental health", "stress management", "mindfulness"],
+    "creativity": ["art", "music", "write", "create", "creative", "design", "passion", "express", "imagination", "inspiration"],
+    "learning": ["school", "study", "exam", "test", "grade", "class", "university", "college", "student", "learning", "teach"]
+}
+
+NEED_KEYWORDS = {
+    "support": ["help", "support", "need", "struggling", "can't", "unable", "stuck", "difficulty"],
+    "understanding": ["understand", "get it", "see", "know", "hear me", "listen", "explain"],
+    "connection": ["lonely", "alone", "isolated", "talk", "share", "connect", "community"],
+    "validation": ["right", "ok", "normal", "feel", "valid", "deserve", "matter"],
+    "action": ["change", "do", "fix", "improve", "need to", "must", "should", "want to"],
+    "rest": ["tired", "exhausted", "need break", "sleep", "rest", "relax", "pause", "slow down"],
+    "clarity": ["confused", "unsure", "lost", "don't know", "unclear", "questions", "wondering"],
+    "hope": ["hopeful", "believe", "faith", "future", "will be", "possible", "optimistic", "better"],
+    "acceptance": ["struggle with", "accept", "let go", "forgive", "peace"],
+    "growth": ["learn", "understand myself", "figure out", "discover", "evolve"]
+}
+
+LEXICONS = {
+    "emotion": EMOTION_KEYWORDS,
+    "theme": THEME_KEYWORDS,
+    "need": NEED_KEYWORDS,
+}
+
+# Words may carry an inner apostrophe ("can't", "don't") but never split on it,
+# so short keywords like "do" or "am" only ever match whole words.
+WORD_PATTERN = re.compile(r"[a-z0-9]+(?:'[a-z0-9]+)*")
+
+LexiconMatch = namedtuple("LexiconMatch", ["lexicon", "label", "phrase", "start", "end"])
+
+def word_forms(word: str) -> tuple:
+    """
+    The word plus the base forms a common inflection of it may come from
+    Covers -s, -es, -ies, -ed, -ied and -ing, including a dropped final e
+    ("writing") and a doubled consonant ("stopped"). Words under four
+    letters ("is", "was", "red") and -ss / -eed endings ("class", "need")
+    are left alone, so short words never collapse onto unrelated keywords.
+    """
+    forms = [word]
+    if len(word) < 4:
+        return tuple(forms)
+    if word.endswith("ies"):
+        forms.append(word[:-3] + "y")
+    elif word.endswith("es"):
+        forms += [word[:-2], word[:-1]]
+    elif word.endswith("s") and not word.endswith("ss"):
+        forms.append(word[:-1])
+    elif word.endswith("ied"):
+        forms.append(word[:-3] + "y")
+    elif word.endswith("ed") and not word.endswith("eed"):
+        forms += _verb_stems(word[:-2])
+    elif word.endswith("ing") and len(word) >= 5:
+        forms += _verb_stems(word[:-3])
+    return tuple(forms)
+
+def _verb_stems(stem: str) -> list:
+    stems = [stem, stem + "e"]
+    if len(stem) > 2 and stem[-1] == stem[-2]:
+        stems.append(stem[:-1])
+    return stems
+
+class LexiconMatcher:
+    """Finds every keyword of several lexicons in a single pass over the text.
+
+    Keywords are compiled once into a word-level trie, so a scan walks the
+    text's words left to right and follows the trie from each word. Each
+    text word also tries its uninflected forms, so "friends" and "meetings"
+    hit "friend" and "meeting", while "bills" no longer hides "ill".
+    Overlapping phrases ("need" and "need to") are all reported, with
+    character offsets into the lowercased text.
+    """
+
+    def __init__(self, lexicons: dict):
+        self.lexicons = lexicons
+        self._trie = {}
+        self._label_order = {}
+
+        for lexicon, keywords in lexicons.items():
+            self._label_order[lexicon] = {label: i for i, label in enumerate(keywords)}
+            for label, phrases in keywords.items():
+                for phrase in phrases:
+                    self._add(lexicon, label, phrase.lower())
+
+    def _add(self, lexicon: str, label: str, phrase: str):
+        words = WORD_PATTERN.findall(phrase)
+        node = self._trie
+        for word in words:
+            node = node.setdefault(word, {})
+        hits = node.setdefault(None, [])
+        if (lexicon, label, phrase) not in hits:
+            hits.append((lexicon, label, phrase))
+
+    def scan(self, text: str) -> list:
+        """Return a LexiconMatch for every keyword occurrence, ordered by position"""
+        text = text.lower().replace("\u2019", "'")
+        words = [(word_forms(m.group()), m.start(), m.end()) for m in WORD_PATTERN.finditer(text)]
+        matches = []
+
+        for i, (_, start, _) in enumerate(words):
+            seen = set()
+            # Trie nodes reachable from word i, paired with the index of their last word
+            frontier = [(self._trie, i)]
+            while frontier:
+                node, j = frontier.pop()
+                if j >= len(words):
+                    continue
+                for form in words[j][0]:
+                    child = node.get(form)
+                    if child is None:
+                        continue
+                    for lexicon, label, phrase in child.get(None, ()):
+                        if (lexicon, label, phrase) not in seen:
+                            seen.add((lexicon, label, phrase))
+                            matches.append(LexiconMatch(lexicon, label, phrase, start, words[j][2]))
+                    frontier.append((child, j + 1))
+
+        return matches
+
+    def labels(self, matches: list, lexicon: str) -> list:
+        """Distinct labels of one lexicon hit by `matches`, in lexicon order"""
+        order = self._label_order[lexicon]
+        found = {m.label for m in matches if m.lexicon == lexicon}
+        return sorted(found, key=order.__getitem__)
+
+lexicon_matcher = LexiconMatcher(LEXICONS)
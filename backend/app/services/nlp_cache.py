@@ -0,0 +1,95 @@
+import copy
+import functools
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+class ContentCache:
+    """Bounded LRU cache with per-entry TTL, keyed by a hash of the analyzed text.
+
+    Thread-safe so NLP pool threads can share it. Each worker process keeps
+    its own cache when the pool runs in process mode.
+    """
+
+    def __init__(self, maxsize: int = 4096, ttl: float = 3600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str):
+        """Return (found, value); expired entries count as misses"""
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None:
+                expires_at, value = item
+                if expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return True, value
+                del self._data[key]
+            self.misses += 1
+            return False, None
+
+    def set(self, key: str, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+nlp_cache = ContentCache(
+    maxsize=int(os.getenv("NLP_CACHE_SIZE", 4096)),
+    ttl=float(os.getenv("NLP_CACHE_TTL", 3600))
+)
+
+def hash_text(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+def content_key(namespace: str, text) -> str:
+    # Documents carry a precomputed digest, so shared text is hashed only once
+    digest = text.digest if hasattr(text, "digest") else hash_text(text)
+    return f"{namespace}:{digest}"
+
+def cached_by_content(namespace: str):
+    """Memoize a pure function of one text (or Document) argument in the shared nlp_cache.
+
+    Callers get a copy of mutable results, so mutating a returned dict or
+    list never leaks into later cache hits. Exceptions propagate and are
+    never cached; callers that want a default apply it outside the cache.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(text):
+            key = content_key(namespace, text)
+            found, value = nlp_cache.get(key)
+            if not found:
+                value = fn(text)
+                nlp_cache.set(key, value)
+            if isinstance(value, (str, int, float, bool, type(None))):
+                return value
+            return copy.deepcopy(value)
+        return wrapper
+    return decorator
@@ -1,143 +1,266 @@
-from textblob import TextBlob
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
-import nltk
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize, sent_tokenize
+import logging
+import os
 import re
+import threading
 from collections import Counter
+from functools import cached_property
+from concurrent.futures import ProcessPoolExecutor
+from app.services.nlp_cache import cached_by_content, hash_text
 
-try:
-    stopwords.words('english')
-except LookupError:
-    try:
-        nltk.download('stopwords', quiet=True)
-        nltk.download('punkt_tab', quiet=True)
-    except Exception as e:
-        print(f"Warning: Could not download NLTK data: {e}")
+logger = logging.getLogger(__name__)
+
+# With NLP_OFFLINE set, missing NLTK data is never downloaded; the scorers
+# that need it raise, and callers fall back to empty results.
+NLP_OFFLINE = os.getenv("NLP_OFFLINE", "").lower() in ("1", "true", "yes")
+
+NLTK_RESOURCES = {
+    "stopwords": "corpora/stopwords",
+    "punkt_tab": "tokenizers/punkt_tab",
+}
+
+# NLTK, VADER and TextBlob are imported and built on first use rather than at
+# import time, once per process, so importing this module stays cheap.
+_load_lock = threading.Lock()
+_nltk_checked = False
+_vader_analyzer = None
+_textblob_analyzer = None
+_stop_words = None
 
-vader_analyzer = SentimentIntensityAnalyzer()
+def ensure_nltk_data():
+    """Make sure the NLTK corpora we use are present, downloading unless offline"""
+    global _nltk_checked
+    if _nltk_checked:
+        return
+    with _load_lock:
+        if _nltk_checked:
+            return
+        import nltk
+        for name, path in NLTK_RESOURCES.items():
+            try:
+                nltk.data.find(path)
+            except LookupError:
+                if NLP_OFFLINE:
+                    logger.warning("NLTK resource '%s' is missing and NLP_OFFLINE is set", name)
+                    continue
+                try:
+                    nltk.download(name, quiet=True)
+                except Exception as e:
+                    logger.warning("Could not download NLTK data: %s", e)
+        _nltk_checked = True
+
+def get_vader():
+    global _vader_analyzer
+    if _vader_analyzer is None:
+        with _load_lock:
+            if _vader_analyzer is None:
+                from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+                _vader_analyzer = SentimentIntensityAnalyzer()
+    return _vader_analyzer
+
+def get_textblob_analyzer():
+    """TextBlob's default sentiment analyzer; calling it directly skips building a full TextBlob per text"""
+    global _textblob_analyzer
+    if _textblob_analyzer is None:
+        with _load_lock:
+            if _textblob_analyzer is None:
+                from textblob.sentiments import PatternAnalyzer
+                _textblob_analyzer = PatternAnalyzer()
+    return _textblob_analyzer
+
+def get_stop_words() -> set:
+    """English stopwords, read from the NLTK corpus once per process"""
+    global _stop_words
+    if _stop_words is None:
+        ensure_nltk_data()
+        from nltk.corpus import stopwords
+        _stop_words = set(stopwords.words('english'))
+    return _stop_words
+
+def warmup():
+    """Load every model and corpus up front so the first request does not pay for it"""
+    ensure_nltk_data()
+    get_vader()
+    get_textblob_analyzer()
+    analyze_sentiment_and_keywords("Warming up the journal analyzer. It was a good day.")
+
+class Document:
+    """
+    A text plus the tokenizations the NLP helpers need
+    Sentences, tokens, lowercase text and per-sentence VADER scores are each
+    computed lazily, at most once, and shared by every function given the
+    same Document.
+    """
+    
+    def __init__(self, text: str):
+        self.text = text
+    
+    @cached_property
+    def lower(self) -> str:
+        return self.text.lower()
+    
+    @cached_property
+    def digest(self) -> str:
+        return hash_text(self.text)
+    
+    @cached_property
+    def sentences(self) -> list[str]:
+        ensure_nltk_data()
+        from nltk.tokenize import sent_tokenize
+        return sent_tokenize(self.text)
+    
+    @cached_property
+    def tokens(self) -> list[str]:
+        ensure_nltk_data()
+        from nltk.tokenize import word_tokenize
+        return word_tokenize(self.lower)
+    
+    @cached_property
+    def words(self) -> list[str]:
+        return self.lower.split()
+    
+    @cached_property
+    def sentence_sentiments(self) -> list[float]:
+        vader = get_vader()
+        return [vader.polarity_scores(sentence)['compound'] for sentence in self.sentences]
+
+def as_document(text: str | Document) -> Document:
+    return text if isinstance(text, Document) else Document(text)
 
 NEGATIVE_WORDS = {'sad', 'unhappy', 'depressed', 'anxious', 'worried', 'stressed', 'angry', 'frustrated', 'disappointed', 'upset', 'bad', 'terrible', 'awful', 'horrible', 'hate', 'dislike', 'pain', 'hurt', 'sick', 'tired', 'exhausted', 'scared', 'afraid', 'lonely', 'alone', 'lost', 'confused', 'broken'}
 POSITIVE_WORDS = {'happy', 'great', 'wonderful', 'excellent', 'amazing', 'awesome', 'love', 'like', 'joy', 'grateful', 'blessed', 'calm', 'peaceful', 'content', 'excited', 'energetic', 'confident', 'strong', 'proud', 'successful', 'good', 'fantastic', 'lovely'}
 
-def analyze_sentiment_and_keywords(text: str) -> tuple[float, str]:
+def score_or_default(scorer, text: str | Document, default):
+    """
+    scorer(text), or default when it raises
+    The scorers raise instead of returning defaults themselves, so the
+    default sits outside their cache and a failure is retried next time.
+    """
     try:
-        cleaned_text = clean_text(text)
-        sentiment_score = get_sentiment_score(text)
-        keywords = extract_keywords(cleaned_text)
-        keywords_str = ",".join(keywords)
-        return sentiment_score, keywords_str
+        return scorer(text)
     except Exception as e:
-        print(f"Error in sentiment analysis: {e}")
-        return 0.0, ""
+        logger.error("Error in %s: %s", scorer.__name__, e)
+        return default
 
-def get_sentiment_score(text: str) -> float:
+def analyze_sentiment_and_keywords(text: str | Document) -> tuple[float, str]:
+    doc = as_document(text)
+    sentiment_score = score_or_default(get_sentiment_score, doc, 0.0)
+    keywords = score_or_default(extract_keywords, clean_text(doc.text), [])
+    return sentiment_score, ",".join(keywords)
+
+def analyze_many(texts: list[str], workers: int = 1, chunk_size: int = 256) -> list[tuple[float, str]]:
+    """
+    Batch version of analyze_sentiment_and_keywords
+    Results come back in input order. With workers > 1, chunks of the batch
+    are scored in a process pool; otherwise the batch runs in-process.
+    """
+    texts = list(texts)
+    if workers <= 1 or len(texts) <= chunk_size:
+        return _analyze_chunk(texts)
+    
+    chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for chunk_results in pool.map(_analyze_chunk, chunks):
+            results.extend(chunk_results)
+    return results
+
+def _analyze_chunk(texts: list[str]) -> list[tuple[float, str]]:
+    return [analyze_sentiment_and_keywords(text) for text in texts]
+
+@cached_by_content("sentiment")
+def get_sentiment_score(text: str | Document) -> float:
     """
     Advanced sentiment analysis using VADER + TextBlob hybrid approach
     VADER is optimized for social media and informal text
     """
-    try:
-        vader_scores = vader_analyzer.polarity_scores(text)
-        vader_compound = vader_scores['compound']
-        
-        blob = TextBlob(text)
-        textblob_polarity = blob.sentiment.polarity
-        
-        combined_score = (vader_compound * 0.6) + (textblob_polarity * 0.4)
-        
-        return round(combined_score, 2)
-    except Exception as e:
-        print(f"Error calculating sentiment: {e}")
-        return 0.0
+    doc = as_document(text)
+    vader_scores = get_vader().polarity_scores(doc.text)
+    vader_compound = vader_scores['compound']
+    
+    textblob_polarity = get_textblob_analyzer().analyze(doc.text).polarity
+    
+    combined_score = (vader_compound * 0.6) + (textblob_polarity * 0.4)
+    
+    return round(combined_score, 2)
 
-def extract_keywords(text: str) -> list[str]:
+@cached_by_content("keywords")
+def extract_keywords(text: str | Document) -> list[str]:
     """Extract meaningful keywords using TF-IDF concept"""
-    try:
-        stop_words = set(stopwords.words('english'))
-        sentences = sent_tokenize(text)
-        
-        words = word_tokenize(text.lower())
-        keywords_list = [
-            word for word in words 
-            if word.isalnum() and word not in stop_words and len(word) > 3
-        ]
-        
-        keyword_freq = Counter(keywords_list)
-        sorted_keywords = sorted(keyword_freq.items(), key=lambda x: x[1], reverse=True)
-        
-        return [kw for kw, _ in sorted_keywords[:10]]
-    except Exception as e:
-        print(f"Error extracting keywords: {e}")
-        return []
+    stop_words = get_stop_words()
+    
+    words = as_document(text).tokens
+    keywords_list = [
+        word for word in words 
+        if word.isalnum() and word not in stop_words and len(word) > 3
+    ]
+    
+    keyword_freq = Counter(keywords_list)
+    sorted_keywords = sorted(keyword_freq.items(), key=lambda x: x[1], reverse=True)
+    
+    return [kw for kw, _ in sorted_keywords[:10]]
 
 def clean_text(text: str) -> str:
     text = re.sub(r'[^a-zA-Z0-9\s]', '', text)
     text = ' '.join(text.split())
     return text
 
-def extract_emotion_intensity(text: str) -> dict:
+@cached_by_content("intensity")
+def extract_emotion_intensity(text: str | Document) -> dict:
     """
     Measure emotional intensity across multiple dimensions
     Returns intensity scores for different emotional aspects
     """
-    try:
-        sentences = sent_tokenize(text)
-        
-        emotion_intensities = {
-            'positive_intensity': 0,
-            'negative_intensity': 0,
-            'emotional_words_count': 0,
-            'avg_sentence_sentiment': 0,
-            'sentiment_variance': 0
-        }
+    doc = as_document(text)
+    
+    emotion_intensities = {
+        'positive_intensity': 0,
+        'negative_intensity': 0,
+        'emotional_words_count': 0,
+        'avg_sentence_sentiment': 0,
+        'sentiment_variance': 0
+    }
+    
+    sentiment_scores = doc.sentence_sentiments
+    emotional_word_count = 0
+    
+    for sentence in doc.sentences:
+        words_in_sentence = sentence.lower().split()
+        emotional_word_count += sum(1 for word in words_in_sentence if word in POSITIVE_WORDS or word in NEGATIVE_WORDS)
+    
+    if sentiment_scores:
+        positive_scores = [s for s in sentiment_scores if s > 0.1]
+        negative_scores = [s for s in sentiment_scores if s < -0.1]
         
-        sentiment_scores = []
-        emotional_word_count = 0
+        emotion_intensities['positive_intensity'] = round(sum(positive_scores) / len(sentiment_scores) if sentiment_scores else 0, 2)
+        emotion_intensities['negative_intensity'] = round(abs(sum(negative_scores) / len(sentiment_scores)) if sentiment_scores else 0, 2)
+        emotion_intensities['emotional_words_count'] = emotional_word_count
+        emotion_intensities['avg_sentence_sentiment'] = round(sum(sentiment_scores) / len(sentiment_scores), 2)
         
-        for sentence in sentences:
-            vader_scores = vader_analyzer.polarity_scores(sentence)
-            compound = vader_scores['compound']
-            sentiment_scores.append(compound)
-            
-            words_in_sentence = sentence.lower().split()
-            emotional_word_count += sum(1 for word in words_in_sentence if word in POSITIVE_WORDS or word in NEGATIVE_WORDS)
-        
-        if sentiment_scores:
-            positive_scores = [s for s in sentiment_scores if s > 0.1]
-            negative_scores = [s for s in sentiment_scores if s < -0.1]
-            
-            emotion_intensities['positive_intensity'] = round(sum(positive_scores) / len(sentiment_scores) if sentiment_scores else 0, 2)
-            emotion_intensities['negative_intensity'] = round(abs(sum(negative_scores) / len(sentiment_scores)) if sentiment_scores else 0, 2)
-            emotion_intensities['emotional_words_count'] = emotional_word_count
-            emotion_intensities['avg_sentence_sentiment'] = round(sum(sentiment_scores) / len(sentiment_scores), 2)
-            
-            if len(sentiment_scores) > 1:
-                mean = sum(sentiment_scores) / len(sentiment_scores)
-                variance = sum((x - mean) ** 2 for x in sentiment_scores) / len(sentiment_scores)
-                emotion_intensities['sentiment_variance'] = round(variance, 2)
-        
-        return emotion_intensities
-    except Exception as e:
-        print(f"Error extracting emotion intensity: {e}")
-        return {}
+        if len(sentiment_scores) > 1:
+            mean = sum(sentiment_scores) / len(sentiment_scores)
+            variance = sum((x - mean) ** 2 for x in sentiment_scores) / len(sentiment_scores)
+            emotion_intensities['sentiment_variance'] = round(variance, 2)
+    
+    return emotion_intensities
 
-def detect_emotional_context(text: str) -> dict:
+def detect_emotional_context(text: str | Document) -> dict:
     """
     Detect emotional context clues and narrative elements
     """
     try:
-        text_lower = text.lower()
+        doc = as_document(text)
+        text_lower = doc.lower
         
         context = {
-            'has_questions': '?' in text,
-            'has_exclamations': '!' in text,
+            'has_questions': '?' in doc.text,
+            'has_exclamations': '!' in doc.text,
             'is_reflective': any(word in text_lower for word in ['i think', 'i feel', 'i believe', 'i realize', 'perhaps', 'maybe']),
             'mentions_others': any(word in text_lower for word in ['my', 'they', 'he', 'she', 'we', 'their', 'someone', 'people']),
-            'is_narrative': len(sent_tokenize(text)) > 3,
-            'text_length': len(text.split()),
+            'is_narrative': len(doc.sentences) > 3,
+            'text_length': len(doc.words),
         }
         
         return context
     except Exception as e:
-        print(f"Error detecting emotional context: {e}")
+        logger.error("Error detecting emotional context: %s", e)
         return {}
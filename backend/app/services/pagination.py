@@ -0,0 +1,43 @@
+import base64
+import json
+from datetime import datetime
+from sqlalchemy import Select, tuple_
+from app.models import JournalEntry
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded"""
+
+def encode_cursor(entry: JournalEntry) -> str:
+    """Opaque cursor pointing just past `entry` in (created_at desc, id desc) order"""
+    payload = json.dumps([entry.created_at.isoformat(), entry.id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, entry_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(created_at), int(entry_id)
+    except Exception as e:
+        raise InvalidCursorError("Invalid cursor") from e
+
+def page_statement(statement: Select, limit: int, cursor: str = None, offset: int = 0) -> Select:
+    """
+    Restrict an entries SELECT to one page, newest first
+    With a cursor the page is a keyset seek on (created_at, id), which the
+    (user_id, created_at, id) index serves at the same cost on any page;
+    offset is kept for older clients. One extra row is fetched so
+    split_page can tell whether another page exists.
+    """
+    if cursor is not None:
+        created_at, entry_id = decode_cursor(cursor)
+        statement = statement.where(tuple_(JournalEntry.created_at, JournalEntry.id) < tuple_(created_at, entry_id))
+    statement = statement.order_by(JournalEntry.created_at.desc(), JournalEntry.id.desc())
+    if cursor is None and offset:
+        statement = statement.offset(offset)
+    return statement.limit(limit + 1)
+
+def split_page(rows: list, limit: int) -> tuple[list, str | None]:
+    """The page's entries and the cursor for the next page, None on the last page"""
+    if len(rows) > limit:
+        return rows[:limit], encode_cursor(rows[limit - 1])
+    return rows, None
@@ -1,128 +1,266 @@
-from app.models import JournalEntry
+import logging
+import numpy as np
+from app.models import JournalEntry, EntryKeyword
 from app.schemas import PatternResult
+from app.services.keyword_service import split_keywords
 from typing import List
-from collections import Counter
-from datetime import datetime, timedelta
+from sqlalchemy.orm import Session
 
-def find_mood_patterns(entries: List[JournalEntry]) -> List[PatternResult]:
+logger = logging.getLogger(__name__)
+
+DAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+class EntryColumns:
+    """
+    A user's entries as parallel NumPy arrays, built once per pattern run
+    Keyword occurrences are stored flat: occurrence i belongs to row
+    keyword_entry[i], names vocabulary[keyword_ids[i]] and is the
+    keyword_slot[i]-th keyword of that entry. Vocabulary ids follow
+    first-seen order, so iterating ids matches iterating entries.
+    """
+
+    def __init__(self, timestamps, sentiment, mood, keyword_entry, keyword_ids, keyword_slot, vocabulary):
+        self.timestamps = timestamps
+        self.sentiment = sentiment
+        self.mood = mood
+        self.keyword_entry = keyword_entry
+        self.keyword_ids = keyword_ids
+        self.keyword_slot = keyword_slot
+        self.vocabulary = vocabulary
+
+    def __len__(self) -> int:
+        return len(self.sentiment)
+
+    @classmethod
+    def build(cls, created_at, sentiment, mood, keyword_lists) -> "EntryColumns":
+        vocab = {}
+        keyword_entry, keyword_ids, keyword_slot = [], [], []
+        for row, keywords in enumerate(keyword_lists):
+            for slot, kw in enumerate(keywords):
+                keyword_entry.append(row)
+                keyword_ids.append(vocab.setdefault(kw, len(vocab)))
+                keyword_slot.append(slot)
+
+        return cls(
+            timestamps=np.array(created_at, dtype="datetime64[us]"),
+            sentiment=np.array(sentiment, dtype=np.float64),
+            mood=np.array([m or 0 for m in mood], dtype=np.int64),
+            keyword_entry=np.array(keyword_entry, dtype=np.int64),
+            keyword_ids=np.array(keyword_ids, dtype=np.int64),
+            keyword_slot=np.array(keyword_slot, dtype=np.int64),
+            vocabulary=list(vocab)
+        )
+
+    @classmethod
+    def from_entries(cls, entries: List[JournalEntry]) -> "EntryColumns":
+        return cls.build(
+            [e.created_at for e in entries],
+            [e.sentiment_score for e in entries],
+            [e.mood_level for e in entries],
+            [split_keywords(e.keywords) for e in entries]
+        )
+
+def load_entry_columns(db: Session, user_id: int) -> EntryColumns:
+    """Load a user's entries and their entry_keywords rows straight into columns"""
+    rows = db.query(
+        JournalEntry.id,
+        JournalEntry.created_at,
+        JournalEntry.sentiment_score,
+        JournalEntry.mood_level
+    ).filter(
+        JournalEntry.user_id == user_id
+    ).order_by(JournalEntry.id).all()
+
+    keyword_rows = db.query(EntryKeyword.entry_id, EntryKeyword.keyword).filter(
+        EntryKeyword.user_id == user_id
+    ).order_by(EntryKeyword.entry_id, EntryKeyword.id).all()
+
+    keyword_lists = {entry_id: [] for entry_id, _, _, _ in rows}
+    for entry_id, keyword in keyword_rows:
+        if entry_id in keyword_lists:
+            keyword_lists[entry_id].append(keyword)
+
+    return EntryColumns.build(
+        [r.created_at for r in rows],
+        [r.sentiment_score for r in rows],
+        [r.mood_level for r in rows],
+        list(keyword_lists.values())
+    )
+
+def as_columns(entries) -> EntryColumns:
+    return entries if isinstance(entries, EntryColumns) else EntryColumns.from_entries(entries)
+
+def find_mood_patterns(entries) -> List[PatternResult]:
+    """Top mood patterns for a list of entries or a prebuilt EntryColumns"""
     try:
-        if len(entries) < 3:
+        columns = as_columns(entries)
+        if len(columns) < 3:
             return []
-        
+
         patterns = []
-        
-        patterns.extend(find_keyword_sentiment_correlation(entries))
-        patterns.extend(find_temporal_patterns(entries))
-        patterns.extend(find_mood_sequences(entries))
-        
+
+        patterns.extend(find_keyword_sentiment_correlation(columns))
+        patterns.extend(find_temporal_patterns(columns))
+        patterns.extend(find_mood_sequences(columns))
+
         patterns = sorted(patterns, key=lambda p: p.confidence, reverse=True)
         return patterns[:5]
     except Exception as e:
-        print(f"Error finding patterns: {e}")
+        logger.error("Error finding patterns: %s", e)
         return []
 
-def find_keyword_sentiment_correlation(entries: List[JournalEntry]) -> List[PatternResult]:
+def find_keyword_sentiment_correlation(entries) -> List[PatternResult]:
     try:
-        keyword_sentiments = {}
-        keyword_counts = {}
-        
-        for entry in entries:
-            if entry.keywords:
-                keywords = [kw.strip() for kw in entry.keywords.split(",")]
-                for kw in keywords:
-                    if kw not in keyword_sentiments:
-                        keyword_sentiments[kw] = []
-                        keyword_counts[kw] = 0
-                    keyword_sentiments[kw].append(entry.sentiment_score)
-                    keyword_counts[kw] += 1
-        
+        columns = as_columns(entries)
+        vocab_size = len(columns.vocabulary)
+        if not vocab_size:
+            return []
+
+        # bincount adds weights in input order, so sums match a sequential sum()
+        counts = np.bincount(columns.keyword_ids, minlength=vocab_size)
+        sums = np.bincount(
+            columns.keyword_ids,
+            weights=columns.sentiment[columns.keyword_entry],
+            minlength=vocab_size
+        )
+        avg_sentiments = sums / np.maximum(counts, 1)
+
         patterns = []
-        for keyword, sentiments in keyword_sentiments.items():
-            if len(sentiments) >= 2:
-                avg_sentiment = sum(sentiments) / len(sentiments)
-                
-                if avg_sentiment < -0.3:
-                    confidence = min(len(sentiments) / len(entries), 1.0)
-                    patterns.append(PatternResult(
-                        trigger=f"Entries mentioning '{keyword}'",
-                        confidence=confidence,
-                        frequency=len(sentiments),
-                        avg_sentiment_impact=round(avg_sentiment, 2)
-                    ))
-        
+        for kw_id in np.flatnonzero((counts >= 2) & (avg_sentiments < -0.3)):
+            frequency = int(counts[kw_id])
+            patterns.append(PatternResult(
+                trigger=f"Entries mentioning '{columns.vocabulary[kw_id]}'",
+                confidence=min(frequency / len(columns), 1.0),
+                frequency=frequency,
+                avg_sentiment_impact=round(float(avg_sentiments[kw_id]), 2)
+            ))
+
         return patterns
     except Exception as e:
-        print(f"Error in keyword correlation: {e}")
+        logger.error("Error in keyword correlation: %s", e)
         return []
 
-def find_temporal_patterns(entries: List[JournalEntry]) -> List[PatternResult]:
+def find_temporal_patterns(entries) -> List[PatternResult]:
     try:
-        day_sentiments = {}
-        day_counts = {}
-        
-        for entry in entries:
-            day_of_week = entry.created_at.strftime("%A")
-            if day_of_week not in day_sentiments:
-                day_sentiments[day_of_week] = []
-                day_counts[day_of_week] = 0
-            day_sentiments[day_of_week].append(entry.sentiment_score)
-            day_counts[day_of_week] += 1
-        
+        columns = as_columns(entries)
+        if not len(columns):
+            return []
+
+        # 1970-01-01 was a Thursday, so shifting by 3 makes Monday 0
+        days = columns.timestamps.astype("datetime64[D]").astype(np.int64)
+        day_of_week = (days + 3) % 7
+
+        counts = np.bincount(day_of_week, minlength=7)
+        sums = np.bincount(day_of_week, weights=columns.sentiment, minlength=7)
+        seen_days, first_seen = np.unique(day_of_week, return_index=True)
+
         patterns = []
-        for day, sentiments in day_sentiments.items():
-            if len(sentiments) >= 2:
-                avg_sentiment = sum(sentiments) / len(sentiments)
-                
+        for day in seen_days[np.argsort(first_seen)]:
+            frequency = int(counts[day])
+            if frequency >= 2:
+                avg_sentiment = float(sums[day] / frequency)
+
                 if avg_sentiment < -0.2:
-                    confidence = min(len(sentiments) / len(entries), 1.0)
                     patterns.append(PatternResult(
-                        trigger=f"Mood pattern on {day}s",
-                        confidence=confidence,
-                        frequency=len(sentiments),
+                        trigger=f"Mood pattern on {DAY_NAMES[day]}s",
+                        confidence=min(frequency / len(columns), 1.0),
+                        frequency=frequency,
                         avg_sentiment_impact=round(avg_sentiment, 2)
                     ))
-        
-        return patterns
-    except Exception as e:
-        print(f"Error in temporal patterns: {e}")
-        return []
 
-def find_mood_sequences(entries: List[JournalEntry]) -> List[PatternResult]:
-    try:
-        sorted_entries = sorted(entries, key=lambda e: e.created_at)
-        
-        patterns = []
-        for i in range(len(sorted_entries) - 2):
-            window = [sorted_entries[i], sorted_entries[i+1], sorted_entries[i+2]]
-            sentiments = [e.sentiment_score for e in window]
-            
-            if all(s < -0.3 for s in sentiments):
-                common_keywords = extract_common_keywords(window)
-                for keyword in common_keywords:
-                    patterns.append(PatternResult(
-                        trigger=f"Consecutive low mood with '{keyword}'",
-                        confidence=0.7,
-                        frequency=3,
-                        avg_sentiment_impact=round(sum(sentiments) / len(sentiments), 2)
-                    ))
-        
         return patterns
     except Exception as e:
-        print(f"Error in mood sequences: {e}")
+        logger.error("Error in temporal patterns: %s", e)
         return []
 
-def extract_common_keywords(entries: List[JournalEntry]) -> List[str]:
+def low_mood_windows(sentiment: np.ndarray) -> np.ndarray:
+    """Start positions of every 3-entry window whose entries are all below -0.3"""
+    low = sentiment < -0.3
+    if len(low) < 3:
+        return np.empty(0, dtype=np.int64)
+
+    # Run-length encode the low-mood mask; a run of length L holds L - 2 windows
+    edges = np.flatnonzero(np.diff(np.concatenate(([False], low, [False])).astype(np.int8)))
+    run_starts, run_ends = edges[::2], edges[1::2]
+    run_lengths = run_ends - run_starts
+    long_runs = run_lengths >= 3
+    run_starts, window_counts = run_starts[long_runs], run_lengths[long_runs] - 2
+    if not len(run_starts):
+        return np.empty(0, dtype=np.int64)
+
+    offsets = np.arange(window_counts.sum()) - np.repeat(np.cumsum(window_counts) - window_counts, window_counts)
+    return np.repeat(run_starts, window_counts) + offsets
+
+def find_mood_sequences(entries) -> List[PatternResult]:
+    """
+    Keywords shared by three consecutive low-mood entries
+    Deliberately deduplicated: a run of N low entries holds N - 2 overlapping
+    windows, and the old loop reported a shared keyword once per window,
+    crowding the top five with copies of one trigger. Each keyword is now
+    reported once, with the average sentiment of its earliest window.
+    """
     try:
-        all_keywords = []
-        for entry in entries:
-            if entry.keywords:
-                all_keywords.extend([kw.strip() for kw in entry.keywords.split(",")])
-        
-        if not all_keywords:
+        columns = as_columns(entries)
+        order = np.argsort(columns.timestamps, kind="stable")
+        sentiment = columns.sentiment[order]
+        windows = low_mood_windows(sentiment)
+        if not len(windows) or not len(columns.vocabulary):
             return []
-        
-        keyword_counts = Counter(all_keywords)
-        return [kw for kw, count in keyword_counts.most_common(3) if count >= 2]
+
+        is_window = np.zeros(len(sentiment), dtype=bool)
+        is_window[windows] = True
+        position = np.empty(len(order), dtype=np.int64)
+        position[order] = np.arange(len(order))
+
+        # Each keyword occurrence at sorted position p falls in windows p-2..p.
+        # Its slot orders keywords the way the window first lists them.
+        occurrence_pos = position[columns.keyword_entry]
+        slot_span = int(columns.keyword_slot.max()) + 1
+        window_ids, keyword_ids, slots = [], [], []
+        for offset in range(3):
+            window = occurrence_pos - offset
+            hit = window >= 0
+            hit[hit] = is_window[window[hit]]
+            window_ids.append(window[hit])
+            keyword_ids.append(columns.keyword_ids[hit])
+            slots.append(offset * slot_span + columns.keyword_slot[hit])
+        window_ids = np.concatenate(window_ids)
+        keyword_ids = np.concatenate(keyword_ids)
+        slots = np.concatenate(slots)
+
+        vocab_size = len(columns.vocabulary)
+        pairs, inverse, counts = np.unique(window_ids * vocab_size + keyword_ids, return_inverse=True, return_counts=True)
+        first_slot = np.full(len(pairs), np.iinfo(np.int64).max)
+        np.minimum.at(first_slot, inverse.ravel(), slots)
+
+        # Counter.most_common(3) filtered to count >= 2: most frequent first,
+        # ties in first-seen order, at most three per window
+        shared = counts >= 2
+        pairs, counts, first_slot = pairs[shared], counts[shared], first_slot[shared]
+        pair_windows = pairs // vocab_size
+        ranked = np.lexsort((first_slot, -counts, pair_windows))
+        pair_windows, pair_keywords = pair_windows[ranked], (pairs % vocab_size)[ranked]
+        group_starts = np.flatnonzero(np.concatenate(([True], pair_windows[1:] != pair_windows[:-1])))
+        rank_in_window = np.arange(len(pair_windows)) - np.repeat(group_starts, np.diff(np.append(group_starts, len(pair_windows))))
+        top = rank_in_window < 3
+
+        patterns = []
+        seen = set()
+        for window, kw_id in zip(pair_windows[top].tolist(), pair_keywords[top].tolist()):
+            keyword = columns.vocabulary[kw_id]
+            if keyword in seen:
+                continue
+            seen.add(keyword)
+
+            window_sentiment = sentiment[window:window + 3].tolist()
+            patterns.append(PatternResult(
+                trigger=f"Consecutive low mood with '{keyword}'",
+                confidence=0.7,
+                frequency=3,
+                avg_sentiment_impact=round(sum(window_sentiment) / len(window_sentiment), 2)
+            ))
+
+        return patterns
     except Exception as e:
-        print(f"Error extracting keywords: {e}")
+        logger.error("Error in mood sequences: %s", e)
         return []
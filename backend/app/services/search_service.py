@@ -0,0 +1,138 @@
+import re
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+FTS_TABLE = "journal_entries_fts"
+PREFIX_TABLE = "journal_entries_prefix_fts"
+
+# SQLite: external-content FTS5 tables over journal_entries. Triggers keep
+# them in step with every insert, update and delete, including bulk Core inserts.
+# FTS_TABLE is porter-stemmed for whole words. Stems are no use for the
+# half-typed last word ("happin" never prefixes the stem "happi"), so that
+# one is matched against PREFIX_TABLE, which keeps words as written.
+SQLITE_TABLES = {
+    FTS_TABLE: "tokenize='porter unicode61'",
+    PREFIX_TABLE: "tokenize='unicode61', prefix='2 3'",
+}
+
+def _sqlite_setup(table: str, options: str) -> list:
+    return [
+        f"""CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5(
+            title, content, content='journal_entries', content_rowid='id', {options}
+        )""",
+        f"""CREATE TRIGGER IF NOT EXISTS {table}_ai AFTER INSERT ON journal_entries BEGIN
+            INSERT INTO {table}(rowid, title, content) VALUES (new.id, new.title, new.content);
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {table}_ad AFTER DELETE ON journal_entries BEGIN
+            INSERT INTO {table}({table}, rowid, title, content) VALUES ('delete', old.id, old.title, old.content);
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {table}_au AFTER UPDATE OF title, content ON journal_entries BEGIN
+            INSERT INTO {table}({table}, rowid, title, content) VALUES ('delete', old.id, old.title, old.content);
+            INSERT INTO {table}(rowid, title, content) VALUES (new.id, new.title, new.content);
+        END""",
+    ]
+
+# Postgres: an expression GIN index, which the database maintains by itself.
+# Queries must repeat the exact expression for the planner to use it.
+PG_DOCUMENT = "to_tsvector('english', coalesce(title, '') || ' ' || coalesce(content, ''))"
+PG_SETUP = [
+    f"CREATE INDEX IF NOT EXISTS ix_journal_entries_search ON journal_entries USING GIN ({PG_DOCUMENT})",
+]
+
+def _sqlite_search(table: str, prefix_filter: bool) -> text:
+    # With earlier whole words, they rank and highlight; the prefix filters, and mark_prefix highlights it
+    prefix = f"AND e.id IN (SELECT rowid FROM {PREFIX_TABLE} WHERE {PREFIX_TABLE} MATCH :prefix)" if prefix_filter else ""
+    return text(f"""
+        SELECT e.id, e.title, e.created_at, e.mood_level, e.sentiment_score,
+               snippet({table}, -1, '<mark>', '</mark>', '…', 12) AS snippet,
+               bm25({table}, 5.0, 1.0) AS rank
+        FROM {table}
+        JOIN journal_entries e ON e.id = {table}.rowid
+        WHERE {table} MATCH :query AND e.user_id = :user_id {prefix}
+        ORDER BY rank
+        LIMIT :limit
+    """)
+
+SQLITE_SEARCH = _sqlite_search(FTS_TABLE, prefix_filter=True)
+SQLITE_PREFIX_SEARCH = _sqlite_search(PREFIX_TABLE, prefix_filter=False)
+
+PG_SEARCH = text(f"""
+    SELECT e.id, e.title, e.created_at, e.mood_level, e.sentiment_score,
+           ts_headline('english', e.content, q, 'StartSel=<mark>, StopSel=</mark>, MaxFragments=1, MaxWords=24, MinWords=8') AS snippet,
+           -ts_rank({PG_DOCUMENT}, q) AS rank
+    FROM journal_entries e, websearch_to_tsquery('english', :query) q
+    WHERE e.user_id = :user_id AND {PG_DOCUMENT} @@ q
+    ORDER BY rank
+    LIMIT :limit
+""")
+
+TERM_PATTERN = re.compile(r"\w+", re.UNICODE)
+MARKED_PATTERN = re.compile(r"(<mark>.*?</mark>)", re.DOTALL)
+
+def init_search(engine: Engine):
+    """Create the full-text indexes for the engine's dialect; safe to run on every startup"""
+    with engine.begin() as conn:
+        if engine.dialect.name == "sqlite":
+            for table, options in SQLITE_TABLES.items():
+                created = not _has_table(conn, table)
+                for statement in _sqlite_setup(table, options):
+                    conn.execute(text(statement))
+                if created:
+                    # Index entries written before the FTS table existed
+                    conn.execute(text(f"INSERT INTO {table}({table}) VALUES ('rebuild')"))
+        elif engine.dialect.name == "postgresql":
+            for statement in PG_SETUP:
+                conn.execute(text(statement))
+
+def _has_table(conn: Connection, name: str) -> bool:
+    return conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+        {"name": name}
+    ).first() is not None
+
+def fts5_query(q: str) -> tuple:
+    """
+    User input as FTS5 queries: (whole words for FTS_TABLE, last word as a prefix for PREFIX_TABLE)
+    Every word must match; the first query is empty when only one word was typed.
+    """
+    terms = TERM_PATTERN.findall(q)
+    if not terms:
+        return "", ""
+    return " ".join(f'"{term}"' for term in terms[:-1]), f'"{terms[-1]}"*'
+
+def mark_prefix(snippet: str, term: str) -> str:
+    """
+    Highlight words starting with term in a snippet, outside its existing marks
+    snippet() only marks matches of its own table's query, so the prefix-matched
+    last word of a multi-word search is marked here. Unlike unicode61, this
+    match is accent-sensitive: "cafe" does not mark "café".
+    """
+    word = re.compile(rf"\b{re.escape(term)}\w*", re.IGNORECASE)
+    parts = MARKED_PATTERN.split(snippet)
+    return "".join(part if i % 2 else word.sub(r"<mark>\g<0></mark>", part) for i, part in enumerate(parts))
+
+def search_entries(db: Session, user_id: int, q: str, limit: int = 20) -> list:
+    """
+    A user's entries matching q, best match first, each with a highlighted snippet
+    rank is bm25 on SQLite and negated ts_rank on Postgres; lower is better on both.
+    """
+    dialect = db.get_bind().dialect.name
+    params = {"user_id": user_id, "limit": limit}
+    if dialect == "postgresql":
+        statement, params["query"] = PG_SEARCH, q
+    else:
+        words, prefix = fts5_query(q)
+        if not prefix:
+            return []
+        if words:
+            statement, params["query"], params["prefix"] = SQLITE_SEARCH, words, prefix
+        else:
+            statement, params["query"] = SQLITE_PREFIX_SEARCH, prefix
+    
+    rows = [dict(row) for row in db.execute(statement, params).mappings()]
+    if dialect != "postgresql" and words:
+        term = TERM_PATTERN.findall(q)[-1]
+        for row in rows:
+            row["snippet"] = mark_prefix(row["snippet"], term)
+    return rows
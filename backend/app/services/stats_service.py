@@ -0,0 +1,158 @@
+import os
+from collections import Counter
+from datetime import datetime
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.models import JournalEntry, EntryAnalysis, UserStats
+from app.services.agent_service import ANALYZER_VERSION
+
+# How many recent entries /agent/patterns looks at by default
+PATTERN_WINDOW = int(os.getenv("PATTERN_WINDOW", 10))
+
+def entry_snapshot(entry) -> tuple:
+    """The parts of an entry the per-user aggregates depend on"""
+    return (entry.sentiment_score or 0.0, entry.mood_level or 0)
+
+def _bump_stats(db: Session, user_id: int, count: int = 0, sentiment: float = 0.0) -> UserStats | None:
+    """
+    Add to the user's entry count and sentiment sum in one UPDATE, then load the row
+    The UPDATE takes the write lock (the row on Postgres, the database on
+    SQLite, where SELECT ... FOR UPDATE does nothing) before the row is read,
+    so concurrent writers queue behind it instead of folding into a stale
+    copy. None when the user has no row yet.
+    """
+    updated = db.query(UserStats).filter(UserStats.user_id == user_id).update({
+        UserStats.entry_count: func.coalesce(UserStats.entry_count, 0) + count,
+        UserStats.sentiment_sum: func.coalesce(UserStats.sentiment_sum, 0.0) + sentiment,
+        UserStats.updated_at: datetime.utcnow(),
+    }, synchronize_session=False)
+    if not updated:
+        return None
+    return db.query(UserStats).filter(UserStats.user_id == user_id).populate_existing().one()
+
+def _create_stats(db: Session, user_id: int) -> UserStats:
+    """
+    Insert the user's first aggregates row, counted from their entries
+    Returns None when a concurrent write inserted the row first; its
+    savepoint is rolled back and the caller's transaction carries on.
+    """
+    # The session does not autoflush; count entry changes pending in it
+    db.flush()
+    try:
+        with db.begin_nested():
+            stats = UserStats(user_id=user_id)
+            db.add(stats)
+            _recount(db, stats)
+    except IntegrityError:
+        return None
+    return stats
+
+def apply_entry_changes(db: Session, user_id: int, removed: list = (), added: list = ()) -> UserStats:
+    """
+    Fold removed and added entry snapshots into the user's aggregates
+    Runs inside the caller's transaction so the aggregates commit (or roll
+    back) together with the entry change itself. A user without a row yet
+    (new, or from before user_stats existed) gets one counted from their
+    entries, which already include this change.
+    """
+    count = len(added) - len(removed)
+    sentiment = sum(s for s, _ in added) - sum(s for s, _ in removed)
+    stats = _bump_stats(db, user_id, count, sentiment)
+    if stats is None:
+        stats = _create_stats(db, user_id)
+        if stats is not None:
+            return stats
+        # Lost the insert race; the winner counted only committed entries, not ours
+        stats = _bump_stats(db, user_id, count, sentiment)
+    _fold_moods(stats, removed, added)
+    refresh_recent_labels(db, stats)
+    return stats
+
+def _fold_moods(stats: UserStats, removed: list, added: list):
+    # Safe as a read-modify-write: _bump_stats holds the write lock until commit
+    moods = Counter(stats.mood_histogram or {})
+    for sign, snapshots in ((-1, removed), (1, added)):
+        for _, mood in snapshots:
+            moods[str(mood)] += sign
+    
+    # JSON columns only persist on reassignment; drop zeroed buckets as we go
+    stats.mood_histogram = {k: v for k, v in moods.items() if v > 0}
+
+def refresh_recent_labels(db: Session, stats: UserStats, window: int = PATTERN_WINDOW):
+    """
+    Recount emotions, themes and needs over the user's `window` newest entries
+    Only entries with a current analysis contribute; labels_analyzed records
+    how many did, so readers can tell complete counts from partial ones.
+    Reads at most `window` stored analyses, so the cost stays flat however
+    long the journal grows.
+    """
+    # The session does not autoflush; make analyses and deletes pending in it visible
+    db.flush()
+    newest = db.query(JournalEntry.id, JournalEntry.created_at).filter(
+        JournalEntry.user_id == stats.user_id
+    ).order_by(JournalEntry.created_at.desc(), JournalEntry.id.desc()).limit(window).subquery()
+    # Count newest first, as the windowed path does, so most_common breaks ties the same way
+    rows = db.query(EntryAnalysis.emotions, EntryAnalysis.themes, EntryAnalysis.needs).join(
+        newest, newest.c.id == EntryAnalysis.entry_id
+    ).filter(EntryAnalysis.analyzer_version == ANALYZER_VERSION).order_by(
+        newest.c.created_at.desc(), newest.c.id.desc()
+    ).all()
+    
+    emotions, themes, needs = Counter(), Counter(), Counter()
+    for entry_emotions, entry_themes, entry_needs in rows:
+        emotions.update(entry_emotions or [])
+        themes.update(entry_themes or [])
+        needs.update(entry_needs or [])
+    
+    stats.emotion_counts = dict(emotions)
+    stats.theme_counts = dict(themes)
+    stats.need_counts = dict(needs)
+    stats.labels_window = window
+    stats.labels_analyzed = len(rows)
+    stats.labels_version = ANALYZER_VERSION
+
+def rebuild_user_stats(db: Session, user_id: int) -> UserStats:
+    """Recompute a user's aggregates from their entries, repairing any drift"""
+    stats = _bump_stats(db, user_id)
+    if stats is None:
+        stats = UserStats(user_id=user_id)
+        db.add(stats)
+    _recount(db, stats)
+    return stats
+
+def _recount(db: Session, stats: UserStats):
+    user_id = stats.user_id
+    count, sentiment_sum = db.query(
+        func.count(JournalEntry.id), func.coalesce(func.sum(JournalEntry.sentiment_score), 0.0)
+    ).filter(JournalEntry.user_id == user_id).one()
+    
+    mood_rows = db.query(
+        JournalEntry.mood_level, func.count(JournalEntry.id)
+    ).filter(JournalEntry.user_id == user_id).group_by(JournalEntry.mood_level)
+    
+    moods = Counter()
+    for mood, n in mood_rows:
+        moods[str(mood or 0)] += n
+    
+    stats.entry_count = count
+    stats.sentiment_sum = sentiment_sum
+    stats.mood_histogram = dict(moods)
+    stats.updated_at = datetime.utcnow()
+    refresh_recent_labels(db, stats)
+
+def get_user_stats(db: Session, user_id: int) -> UserStats:
+    """The user's aggregates, built from their entries the first time they are needed"""
+    stats = db.query(UserStats).filter(UserStats.user_id == user_id).first()
+    if stats is None:
+        stats = _create_stats(db, user_id) or db.query(UserStats).filter(UserStats.user_id == user_id).one()
+        db.commit()
+    return stats
+
+def summarize_stats(stats: UserStats) -> dict:
+    count = stats.entry_count or 0
+    return {
+        "avg_sentiment": round(stats.sentiment_sum / count, 2) if count else 0.0,
+        "mood_distribution": dict(stats.mood_histogram or {}),
+        "total_entries": count,
+    }
@@ -0,0 +1,76 @@
+import secrets
+from datetime import datetime, timedelta
+from sqlalchemy.orm import Session
+from app.auth import create_access_token, create_refresh_token, decode_refresh_token, REFRESH_TOKEN_EXPIRE_DAYS
+from app.models import RefreshTokenFamily
+
+class InvalidRefreshTokenError(ValueError):
+    """Raised when a refresh token is malformed, expired, revoked or already used"""
+
+def _token_pair(family: RefreshTokenFamily) -> dict:
+    return {
+        "access_token": create_access_token(data={"sub": str(family.user_id)}),
+        "refresh_token": create_refresh_token(family.user_id, family.id, family.generation, family.expires_at),
+        "token_type": "bearer"
+    }
+
+def issue_tokens(db: Session, user_id: int) -> dict:
+    """Start a refresh-token family for a fresh login or signup; the caller commits"""
+    purge_expired_families(db, user_id)
+    family = RefreshTokenFamily(
+        id=secrets.token_urlsafe(16),
+        user_id=user_id,
+        generation=0,
+        expires_at=datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+    )
+    db.add(family)
+    return _token_pair(family)
+
+def rotate_tokens(db: Session, refresh_token: str) -> dict:
+    """
+    Exchange a refresh token for a new access and refresh token; the caller commits
+    The signature check rejects forged tokens without touching the database.
+    The generation bump is a conditional UPDATE, so of two requests racing
+    with the same token only one wins. A token from an older generation
+    was used twice, and the family is revoked.
+    """
+    claims = decode_refresh_token(refresh_token)
+    if claims is None:
+        raise InvalidRefreshTokenError("Invalid refresh token")
+    
+    now = datetime.utcnow()
+    rotated = db.query(RefreshTokenFamily).filter(
+        RefreshTokenFamily.id == claims["fam"],
+        RefreshTokenFamily.generation == claims["gen"],
+        RefreshTokenFamily.revoked.is_(False),
+        RefreshTokenFamily.expires_at > now
+    ).update({
+        "generation": RefreshTokenFamily.generation + 1,
+        "expires_at": now + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+    }, synchronize_session=False)
+    
+    family = db.get(RefreshTokenFamily, claims["fam"])
+    if not rotated:
+        if family is not None and family.generation > claims["gen"]:
+            family.revoked = True
+            db.flush()
+        raise InvalidRefreshTokenError("Invalid refresh token")
+    
+    db.refresh(family)
+    return _token_pair(family)
+
+def revoke_tokens(db: Session, refresh_token: str) -> bool:
+    """Revoke the family a refresh token belongs to, ending that login session"""
+    claims = decode_refresh_token(refresh_token)
+    if claims is None:
+        return False
+    return db.query(RefreshTokenFamily).filter(
+        RefreshTokenFamily.id == claims["fam"]
+    ).update({"revoked": True}, synchronize_session=False) == 1
+
+def purge_expired_families(db: Session, user_id: int = None) -> int:
+    """Delete families past their expiry, for one user or everyone"""
+    query = db.query(RefreshTokenFamily).filter(RefreshTokenFamily.expires_at <= datetime.utcnow())
+    if user_id is not None:
+        query = query.filter(RefreshTokenFamily.user_id == user_id)
+    return query.delete(synchronize_session=False)
@@ -0,0 +1,112 @@
+import numpy as np
+from datetime import datetime
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.models import JournalEntry
+
+RESOLUTIONS = ("raw", "day", "week", "month")
+
+def bucket_expression(resolution: str, dialect: str):
+    """SQL expression truncating created_at to the start of its day, week (Monday) or month"""
+    if dialect == "postgresql":
+        return func.date_trunc(resolution, JournalEntry.created_at)
+    if resolution == "day":
+        return func.strftime("%Y-%m-%d", JournalEntry.created_at)
+    if resolution == "week":
+        # 'weekday 0' moves forward to Sunday, then back six days to that week's Monday
+        return func.date(JournalEntry.created_at, "weekday 0", "-6 days")
+    return func.strftime("%Y-%m-01", JournalEntry.created_at)
+
+def _iso(value) -> str:
+    # SQLite buckets come back as 'YYYY-MM-DD'; match Postgres' midnight timestamps
+    return value.isoformat() if isinstance(value, datetime) else datetime.fromisoformat(str(value)).isoformat()
+
+def get_trend_points(db: Session, user_id: int, start_date: datetime, resolution: str = "raw") -> list:
+    """
+    Mood trend points since start_date, oldest first
+    "raw" returns one point per entry; other resolutions aggregate in SQL
+    and return avg/min/max sentiment and mood plus an entry count per bucket.
+    """
+    window = (
+        JournalEntry.user_id == user_id,
+        JournalEntry.created_at >= start_date
+    )
+
+    if resolution == "raw":
+        rows = db.query(
+            JournalEntry.created_at,
+            JournalEntry.sentiment_score,
+            JournalEntry.mood_level,
+            JournalEntry.title
+        ).filter(*window).order_by(JournalEntry.created_at)
+        return [
+            {"date": created_at.isoformat(), "sentiment": sentiment, "mood_level": mood, "title": title}
+            for created_at, sentiment, mood, title in rows
+        ]
+
+    bucket = bucket_expression(resolution, db.get_bind().dialect.name).label("bucket")
+    rows = db.query(
+        bucket,
+        func.avg(JournalEntry.sentiment_score),
+        func.min(JournalEntry.sentiment_score),
+        func.max(JournalEntry.sentiment_score),
+        func.avg(JournalEntry.mood_level),
+        func.min(JournalEntry.mood_level),
+        func.max(JournalEntry.mood_level),
+        func.count(JournalEntry.id)
+    ).filter(*window).group_by(bucket).order_by(bucket)
+
+    return [
+        {
+            "date": _iso(date),
+            "sentiment": round(avg_sentiment or 0.0, 2),
+            "sentiment_min": min_sentiment,
+            "sentiment_max": max_sentiment,
+            "mood_level": round(avg_mood or 0.0, 2),
+            "mood_min": min_mood,
+            "mood_max": max_mood,
+            "count": count
+        }
+        for date, avg_sentiment, min_sentiment, max_sentiment, avg_mood, min_mood, max_mood, count in rows
+    ]
+
+def lttb_indices(xs, ys, threshold: int) -> list:
+    """
+    Largest-Triangle-Three-Buckets downsampling
+    Keeps the first and last point and, from each of threshold - 2 buckets,
+    the point forming the largest triangle with the previous pick and the
+    next bucket's average, so peaks and dips survive the reduction.
+    """
+    n = len(xs)
+    if threshold >= n or threshold < 3:
+        return list(range(n))
+
+    xs = np.asarray(xs, dtype=np.float64)
+    ys = np.asarray(ys, dtype=np.float64)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+
+    selected = [0]
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        if i == threshold - 3:
+            avg_x, avg_y = xs[n - 1], ys[n - 1]
+        else:
+            avg_x, avg_y = xs[end:edges[i + 2]].mean(), ys[end:edges[i + 2]].mean()
+
+        prev_x, prev_y = xs[selected[-1]], ys[selected[-1]]
+        areas = np.abs(
+            (prev_x - avg_x) * (ys[start:end] - prev_y)
+            - (prev_x - xs[start:end]) * (avg_y - prev_y)
+        )
+        selected.append(int(start + np.argmax(areas)))
+    selected.append(n - 1)
+    return selected
+
+def downsample_points(points: list, max_points: int, value_key: str = "sentiment") -> list:
+    """Reduce trend points to at most max_points with LTTB over (time, value_key)"""
+    if not max_points or len(points) <= max_points:
+        return points
+
+    xs = [datetime.fromisoformat(p["date"]).timestamp() for p in points]
+    ys = [p[value_key] or 0.0 for p in points]
+    return [points[i] for i in lttb_indices(xs, ys, max_points)]
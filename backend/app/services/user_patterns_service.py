@@ -0,0 +1,94 @@
+from collections import Counter
+from datetime import datetime, timedelta
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+from app.models import User, JournalEntry, UserStats, UserPatterns
+from app.services.agent_service import ANALYZER_VERSION, extract_and_analyze_patterns, summarize_label_counts
+from app.services.analysis_service import context_from_record, is_current, save_entry_analysis
+from app.services.pattern_service import find_mood_patterns, load_entry_columns
+from app.services.stats_service import PATTERN_WINDOW, get_user_stats
+
+def recent_pattern_entries(db: Session, user_id: int, window: int = PATTERN_WINDOW, days: int = None) -> list:
+    """The user's `window` newest entries, optionally only from the last `days` days, newest first"""
+    query = db.query(JournalEntry).filter(JournalEntry.user_id == user_id)
+    if days is not None:
+        query = query.filter(JournalEntry.created_at >= datetime.utcnow() - timedelta(days=days))
+    return query.order_by(JournalEntry.created_at.desc(), JournalEntry.id.desc()).limit(window).all()
+
+def compute_mood_patterns(db: Session, user_id: int) -> list:
+    """The patterns section of /analytics/summary, as PatternResult models"""
+    if not get_user_stats(db, user_id).entry_count:
+        return []
+    return find_mood_patterns(load_entry_columns(db, user_id))
+
+def compute_entry_patterns(db: Session, user_id: int) -> dict:
+    """/agent/patterns computed synchronously, filling in any missing or stale entry analyses"""
+    entries = recent_pattern_entries(db, user_id)
+    contexts = {}
+    for entry in entries:
+        if is_current(entry.analysis):
+            contexts[entry.id] = context_from_record(entry.analysis)
+        else:
+            contexts[entry.id] = save_entry_analysis(db, entry)
+    return extract_and_analyze_patterns(entries, lambda e: contexts.get(e.id))
+
+def rolling_entry_patterns(stats: UserStats) -> dict | None:
+    """
+    /agent/patterns for the default window from the counts kept in user_stats
+    Only when every entry in the window had a current analysis at count
+    time; bulk imports, pending entries and an ANALYZER_VERSION bump leave
+    the counts partial, and the caller falls back to the windowed query.
+    """
+    if (
+        not stats.entry_count
+        or stats.labels_window != PATTERN_WINDOW
+        or stats.labels_version != ANALYZER_VERSION
+        or stats.labels_analyzed != min(PATTERN_WINDOW, stats.entry_count)
+    ):
+        return None
+    return summarize_label_counts(
+        Counter(stats.emotion_counts or {}),
+        Counter(stats.theme_counts or {}),
+        Counter(stats.need_counts or {})
+    )
+
+def refresh_user_patterns(db: Session, user_id: int) -> UserPatterns:
+    """Recompute and store both pattern sets for a user; the caller commits"""
+    get_user_stats(db, user_id)
+    # Stamp the start of the run, so an entry written mid-computation still
+    # leaves the row stale
+    started = datetime.utcnow()
+    mood_patterns = [p.model_dump() for p in compute_mood_patterns(db, user_id)]
+    entry_patterns = compute_entry_patterns(db, user_id)
+    
+    record = db.get(UserPatterns, user_id)
+    if record is None:
+        record = UserPatterns(user_id=user_id)
+        db.add(record)
+    record.mood_patterns = mood_patterns
+    record.entry_patterns = entry_patterns
+    record.computed_at = started
+    return record
+
+def get_fresh_patterns(db: Session, user_id: int) -> UserPatterns | None:
+    """The stored patterns, unless an entry changed after they were computed"""
+    row = db.query(UserPatterns).join(
+        UserStats, UserStats.user_id == UserPatterns.user_id
+    ).filter(
+        UserPatterns.user_id == user_id,
+        UserPatterns.computed_at >= UserStats.updated_at
+    ).first()
+    return row
+
+def stale_pattern_user_ids(db: Session) -> list:
+    """Users whose stored patterns are missing or older than their latest entry change"""
+    rows = db.query(User.id).outerjoin(
+        UserPatterns, UserPatterns.user_id == User.id
+    ).outerjoin(
+        UserStats, UserStats.user_id == User.id
+    ).filter(or_(
+        UserPatterns.user_id.is_(None),
+        UserStats.user_id.is_(None),
+        UserPatterns.computed_at < UserStats.updated_at
+    )).order_by(User.id)
+    return [user_id for (user_id,) in rows]
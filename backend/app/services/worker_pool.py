@@ -0,0 +1,104 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+class PoolSaturatedError(Exception):
+    """Raised when a pool's bounded queue is full and a job is rejected"""
+
+def _timed_call(fn, args):
+    # Runs inside the worker; reports when the job actually started so the
+    # caller can tell queue wait apart from execution time.
+    return time.time(), fn(*args)
+
+class WorkerPool:
+    """Bounded thread or process executor that async routes await CPU-bound work from.
+
+    At most `workers + max_queue` jobs are accepted at once; beyond that `run`
+    raises PoolSaturatedError instead of letting the backlog grow without limit.
+    """
+
+    def __init__(self, name: str, kind: str = "thread", workers: int = None, max_queue: int = 64):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown pool kind: {kind}")
+        self.name = name
+        self.kind = kind
+        self.workers = workers or min(4, os.cpu_count() or 1)
+        self.max_queue = max_queue
+        self._executor = None
+
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    @classmethod
+    def from_env(cls, name: str, prefix: str, kind: str = "thread", workers: int = None, max_queue: int = 64) -> "WorkerPool":
+        """Build a pool configured by PREFIX_KIND, PREFIX_WORKERS and PREFIX_MAX_QUEUE"""
+        return cls(
+            name,
+            kind=os.getenv(f"{prefix}_KIND", kind),
+            workers=int(os.getenv(f"{prefix}_WORKERS", workers or 0)) or None,
+            max_queue=int(os.getenv(f"{prefix}_MAX_QUEUE", max_queue))
+        )
+
+    def _get_executor(self):
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=self.name)
+        return self._executor
+
+    @property
+    def queue_depth(self) -> int:
+        return max(0, self.in_flight - self.workers)
+
+    async def run(self, fn, *args):
+        """Run fn(*args) on the pool and await its result"""
+        if self.in_flight >= self.workers + self.max_queue:
+            self.rejected += 1
+            raise PoolSaturatedError(f"{self.name} pool is saturated")
+
+        loop = asyncio.get_running_loop()
+        submitted = time.time()
+        self.in_flight += 1
+        try:
+            started, result = await loop.run_in_executor(self._get_executor(), _timed_call, fn, args)
+        finally:
+            self.in_flight -= 1
+
+        wait = max(0.0, started - submitted)
+        self.completed += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        return result
+
+    async def warmup(self, fn):
+        """Run fn on the pool's workers; a process pool warms each worker process"""
+        runs = self.workers if self.kind == "process" else 1
+        await asyncio.gather(*(self.run(fn) for _ in range(runs)))
+
+    def stats(self) -> dict:
+        return {
+            "kind": self.kind,
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_wait_ms": round(self.total_wait / self.completed * 1000, 2) if self.completed else 0.0,
+            "max_wait_ms": round(self.max_wait * 1000, 2),
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+nlp_pool = WorkerPool.from_env("nlp", "NLP_POOL")
+
+# bcrypt releases the GIL, so threads hash in parallel without blocking the event loop
+auth_pool = WorkerPool.from_env("auth", "AUTH_POOL", workers=2, max_queue=32)
@@ -0,0 +1,457 @@
+import argparse
+import multiprocessing
+import time
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from app.database import Base, SessionLocal, engine, init_db
+from app.models import User, JournalEntry
+from app.services.stats_service import rebuild_user_stats
+from app.services.keyword_service import backfill_keywords
+from app.services.pattern_service import EntryColumns, find_mood_patterns
+from app.services.pagination import encode_cursor, page_statement, split_page
+from app.services.user_patterns_service import refresh_user_patterns, stale_pattern_user_ids
+from app.services.token_service import purge_expired_families
+
+def rebuild_stats(args):
+    """Recompute user_stats from journal_entries for one user or all of them"""
+    db = SessionLocal()
+    try:
+        if args.user_id is not None:
+            user_ids = [args.user_id]
+        else:
+            user_ids = [user_id for (user_id,) in db.query(User.id).order_by(User.id)]
+        
+        for i, user_id in enumerate(user_ids, start=1):
+            rebuild_user_stats(db, user_id)
+            db.commit()
+            if i % 100 == 0 or i == len(user_ids):
+                print(f"Rebuilt stats for {i}/{len(user_ids)} users")
+    finally:
+        db.close()
+
+def backfill_entry_keywords(args):
+    """Fill entry_keywords from the legacy comma-joined JournalEntry.keywords column"""
+    db = SessionLocal()
+    try:
+        total = backfill_keywords(db, batch_size=args.batch_size)
+        print(f"Backfilled keywords for {total} entries")
+    finally:
+        db.close()
+
+def _init_pattern_worker():
+    # Connections inherited from the parent process must not be reused here
+    engine.dispose(close=False)
+
+def _compute_pattern_chunk(user_ids: list) -> int:
+    db = SessionLocal()
+    try:
+        for user_id in user_ids:
+            refresh_user_patterns(db, user_id)
+            # Committing per user is what makes an interrupted run resumable
+            db.commit()
+        return len(user_ids)
+    finally:
+        db.close()
+
+def compute_patterns(args):
+    """Materialize mood and entry patterns into user_patterns, using every core"""
+    db = SessionLocal()
+    try:
+        if args.user_id is not None:
+            user_ids = [args.user_id]
+        elif args.force:
+            user_ids = [user_id for (user_id,) in db.query(User.id).order_by(User.id)]
+        else:
+            user_ids = stale_pattern_user_ids(db)
+    finally:
+        db.close()
+    
+    if not user_ids:
+        print("All user patterns are up to date")
+        return
+    
+    chunks = [user_ids[i:i + args.chunk_size] for i in range(0, len(user_ids), args.chunk_size)]
+    done = 0
+    started = time.perf_counter()
+    with multiprocessing.Pool(args.workers, initializer=_init_pattern_worker) as pool:
+        for count in pool.imap_unordered(_compute_pattern_chunk, chunks):
+            done += count
+            elapsed = time.perf_counter() - started
+            print(f"Computed patterns for {done}/{len(user_ids)} users ({done / elapsed:.1f} users/s)")
+
+def purge_refresh_tokens(args):
+    """Delete expired refresh-token families; logins also purge the user's own"""
+    db = SessionLocal()
+    try:
+        purged = purge_expired_families(db)
+        db.commit()
+        print(f"Purged {purged} expired refresh-token families")
+    finally:
+        db.close()
+
+def synthetic_columns(size: int, vocab_size: int = 5000, seed: int = 0) -> EntryColumns:
+    """Random entries for benchmarking: sorted timestamps, skewed-low sentiment, 0-10 keywords each"""
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    seconds = np.sort(rng.integers(0, 3 * 365 * 86400, size))
+    keyword_counts = rng.integers(0, 11, size)
+    occurrences = int(keyword_counts.sum())
+    keyword_entry = np.repeat(np.arange(size), keyword_counts)
+    starts = np.cumsum(keyword_counts) - keyword_counts
+    return EntryColumns(
+        timestamps=np.datetime64("2023-01-01T00:00:00", "us") + seconds.astype("timedelta64[s]"),
+        sentiment=np.round(rng.uniform(-1, 0.6, size), 2),
+        mood=rng.integers(0, 5, size),
+        keyword_entry=keyword_entry,
+        keyword_ids=rng.integers(0, vocab_size, occurrences),
+        keyword_slot=np.arange(occurrences) - np.repeat(starts, keyword_counts),
+        vocabulary=[f"keyword{i}" for i in range(vocab_size)]
+    )
+
+def bench_patterns(args):
+    """Time find_mood_patterns on synthetic columns of increasing size"""
+    for size in args.sizes:
+        columns = synthetic_columns(size)
+        started = time.perf_counter()
+        patterns = find_mood_patterns(columns)
+        elapsed = time.perf_counter() - started
+        print(f"{size:>9} entries: {elapsed * 1000:9.1f} ms, {len(patterns)} patterns")
+
+def bench_pagination(args):
+    """Compare OFFSET and keyset page latency on a throwaway in-memory database"""
+    from sqlalchemy import create_engine, insert, select
+    from sqlalchemy.orm import sessionmaker
+    bench_engine = create_engine("sqlite://")
+    Base.metadata.create_all(bench_engine)
+    db = sessionmaker(bind=bench_engine)()
+    
+    total = args.page_size * args.pages
+    db.add(User(id=1, email="bench@example.com", username="bench", hashed_password=""))
+    start = datetime(2020, 1, 1)
+    db.execute(insert(JournalEntry), [
+        {"user_id": 1, "title": f"Entry {i}", "content": "", "created_at": start + timedelta(minutes=i)}
+        for i in range(total)
+    ])
+    db.commit()
+    print(f"Seeded {total} entries, {args.page_size} per page")
+    
+    def page(**kwargs) -> list:
+        statement = page_statement(select(JournalEntry).where(JournalEntry.user_id == 1), args.page_size, **kwargs)
+        return split_page(db.scalars(statement).all(), args.page_size)[0]
+    
+    def timed(**kwargs) -> float:
+        started = time.perf_counter()
+        for _ in range(args.repeat):
+            page(**kwargs)
+        return (time.perf_counter() - started) / args.repeat * 1000
+    
+    for page_number in (1, args.pages):
+        offset = (page_number - 1) * args.page_size
+        cursor = None
+        if offset:
+            cursor = encode_cursor(page(offset=offset - args.page_size)[-1])
+        print(f"page {page_number:>6}: offset {timed(offset=offset):8.2f} ms, cursor {timed(cursor=cursor):8.2f} ms")
+    db.close()
+
+def bench_memory(args):
+    """
+    Peak traced memory of the analytics summary's data loading, ORM entries against SQL aggregation
+    The ORM side loads whole JournalEntry objects, content included, and
+    aggregates in Python; the SQL side runs the COUNT/SUM and GROUP BY
+    queries and loads only the columns pattern detection reads. Runs on a
+    throwaway in-memory database.
+    """
+    import random
+    import tracemalloc
+    from collections import Counter
+    from sqlalchemy import create_engine, func, insert
+    from sqlalchemy.orm import sessionmaker
+    from app.services.keyword_service import insert_keyword_rows, split_keywords, top_keywords
+    from app.services.pattern_service import load_entry_columns
+    bench_engine = create_engine("sqlite://")
+    Base.metadata.create_all(bench_engine)
+    Session = sessionmaker(bind=bench_engine)
+    
+    rng = random.Random(0)
+    words = [f"word{i}" for i in range(2000)]
+    start = datetime(2020, 1, 1)
+    with Session() as db:
+        for user_id in range(1, args.users + 1):
+            db.add(User(id=user_id, email=f"bench{user_id}@example.com", username=f"bench{user_id}", hashed_password=""))
+            db.flush()
+            rows = [
+                {"user_id": user_id, "title": f"Entry {i}",
+                 "content": " ".join(rng.choices(words, k=args.content_words)),
+                 "sentiment_score": round(rng.uniform(-1, 1), 2), "mood_level": rng.randint(0, 4),
+                 "keywords": ",".join(rng.sample(words[:200], 5)), "created_at": start + timedelta(hours=i)}
+                for i in range(args.entries)
+            ]
+            entry_ids = db.scalars(insert(JournalEntry).returning(JournalEntry.id, sort_by_parameter_order=True), rows).all()
+            insert_keyword_rows(db, [(entry_id, user_id, row["keywords"]) for entry_id, row in zip(entry_ids, rows)])
+        db.commit()
+    print(f"Seeded {args.users} users x {args.entries} entries, ~{args.content_words} words of content each")
+    
+    def orm_summary(db, user_id: int):
+        entries = db.query(JournalEntry).filter(JournalEntry.user_id == user_id).all()
+        moods = Counter(str(e.mood_level or 0) for e in entries)
+        avg = sum(e.sentiment_score for e in entries) / len(entries)
+        keywords = Counter(kw for e in entries for kw in split_keywords(e.keywords)).most_common(10)
+        return avg, moods, keywords, find_mood_patterns(entries)
+    
+    def sql_summary(db, user_id: int):
+        avg = db.query(func.avg(JournalEntry.sentiment_score)).filter(JournalEntry.user_id == user_id).scalar()
+        moods = dict(db.query(JournalEntry.mood_level, func.count(JournalEntry.id)).filter(
+            JournalEntry.user_id == user_id
+        ).group_by(JournalEntry.mood_level).all())
+        return avg, moods, top_keywords(db, user_id), find_mood_patterns(load_entry_columns(db, user_id))
+    
+    for name, summary in (("ORM entries", orm_summary), ("SQL aggregation", sql_summary)):
+        peaks = []
+        started = time.perf_counter()
+        for user_id in range(1, args.users + 1):
+            with Session() as db:
+                tracemalloc.start()
+                summary(db, user_id)
+                peaks.append(tracemalloc.get_traced_memory()[1])
+                tracemalloc.stop()
+        elapsed = (time.perf_counter() - started) / args.users
+        print(f"{name:<16}: peak {max(peaks) / 2**20:8.1f} MiB per request, {elapsed * 1000:8.1f} ms (traced)")
+
+def bench_api(args):
+    """
+    Requests per second against the app in-process at several concurrency levels
+    Seeds a bench@example.com user into the configured database, so point
+    DATABASE_URL at a scratch database.
+    """
+    import asyncio
+    import httpx
+    from sqlalchemy import insert
+    from app.auth import create_access_token
+    from app.main import app
+    
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.email == "bench@example.com").first()
+        if user is None:
+            user = User(email="bench@example.com", username="bench", hashed_password="")
+            db.add(user)
+            db.commit()
+        existing = db.query(JournalEntry).filter(JournalEntry.user_id == user.id).count()
+        if existing < args.entries:
+            start = datetime.utcnow() - timedelta(days=365)
+            db.execute(insert(JournalEntry), [
+                {"user_id": user.id, "title": f"Entry {i}", "content": "A calm and ordinary day at work.",
+                 "sentiment_score": (i % 7 - 3) / 3, "mood_level": i % 5 + 1, "keywords": "",
+                 "created_at": start + timedelta(minutes=i * 30)}
+                for i in range(existing, args.entries)
+            ])
+            rebuild_user_stats(db, user.id)
+            db.commit()
+        headers = {"Authorization": f"Bearer {create_access_token({'sub': str(user.id)})}"}
+    finally:
+        db.close()
+    
+    paths = ["/api/entries/?limit=50", "/api/analytics/trends?days=365&resolution=day", "/api/analytics/summary"]
+    
+    async def run(concurrency: int) -> float:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            remaining = args.requests
+            
+            async def worker():
+                nonlocal remaining
+                while remaining > 0:
+                    remaining -= 1
+                    response = await client.get(paths[remaining % len(paths)], headers=headers)
+                    response.raise_for_status()
+            
+            started = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+            return args.requests / (time.perf_counter() - started)
+    
+    async def run_all() -> list:
+        # One event loop for every level, since the async engine's pool is bound to it
+        return [await run(concurrency) for concurrency in args.concurrency]
+    
+    results = asyncio.run(run_all())
+    for concurrency, rps in zip(args.concurrency, results):
+        print(f"{concurrency:>4} concurrent clients: {rps:8.1f} req/s")
+
+def bench_auth(args):
+    """
+    Logins per second under a login storm, and the latency other requests see meanwhile
+    Seeds an auth-bench@example.com user into the configured database, so
+    point DATABASE_URL at a scratch database.
+    """
+    import asyncio
+    import statistics
+    import httpx
+    from app.auth import create_access_token, hash_password
+    from app.main import app
+    
+    password = "bench-password"
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.email == "auth-bench@example.com").first()
+        if user is None:
+            user = User(email="auth-bench@example.com", username="auth-bench", hashed_password="")
+            db.add(user)
+        user.hashed_password = hash_password(password)
+        db.commit()
+        headers = {"Authorization": f"Bearer {create_access_token({'sub': str(user.id)})}"}
+    finally:
+        db.close()
+    
+    def summary(latencies: list) -> str:
+        cuts = statistics.quantiles(latencies, n=20, method="inclusive")
+        return f"p50 {statistics.median(latencies):7.1f} ms, p95 {cuts[18]:7.1f} ms, max {max(latencies):7.1f} ms"
+    
+    async def probe(client: httpx.AsyncClient, count: int = None, until: asyncio.Event = None) -> list:
+        latencies = []
+        while (count is not None and len(latencies) < count) or (until is not None and not until.is_set()):
+            started = time.perf_counter()
+            response = await client.get("/api/entries/?limit=20", headers=headers)
+            response.raise_for_status()
+            latencies.append((time.perf_counter() - started) * 1000)
+            await asyncio.sleep(0.005)
+        return latencies
+    
+    async def storm(client: httpx.AsyncClient, done: asyncio.Event) -> float:
+        remaining = args.logins
+        
+        async def worker():
+            nonlocal remaining
+            while remaining > 0:
+                remaining -= 1
+                response = await client.post("/api/auth/login", json={"email": "auth-bench@example.com", "password": password})
+                response.raise_for_status()
+        
+        started = time.perf_counter()
+        try:
+            await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        finally:
+            done.set()
+        return args.logins / (time.perf_counter() - started)
+    
+    async def run() -> tuple:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            idle = await probe(client, count=args.probes)
+            done = asyncio.Event()
+            rate, during = await asyncio.gather(storm(client, done), probe(client, until=done))
+            return idle, rate, during
+    
+    idle, rate, during = asyncio.run(run())
+    print(f"{args.logins} logins at {args.concurrency} concurrent clients: {rate:8.1f} logins/s")
+    print(f"GET /api/entries idle:         {summary(idle)}")
+    print(f"GET /api/entries during storm: {summary(during)} ({len(during)} requests)")
+
+# Run in a fresh interpreter per sample, so nothing is imported or warmed up already
+STARTUP_PROBE = """
+import asyncio, json, time
+import httpx
+started = time.perf_counter()
+from app.main import app
+imported = time.perf_counter()
+
+async def first_request() -> float:
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            (await client.get("/health")).raise_for_status()
+            return time.perf_counter()
+
+ready = asyncio.run(first_request())
+print(json.dumps({"import": imported - started, "ready": ready - imported}))
+"""
+
+def bench_startup(args):
+    """
+    Cold-start cost: importing app.main, then lifespan startup through the first /health
+    Each sample is a new Python process, measured with NLP_WARMUP on and
+    off. Startup runs init_db, so point DATABASE_URL at a scratch database.
+    """
+    import json
+    import os
+    import statistics
+    import subprocess
+    import sys
+    
+    backend_dir = os.path.dirname(os.path.abspath(__file__))
+    for warmup in ("true", "false"):
+        env = dict(os.environ, NLP_WARMUP=warmup)
+        samples = []
+        for _ in range(args.runs):
+            output = subprocess.run(
+                [sys.executable, "-c", STARTUP_PROBE],
+                cwd=backend_dir, env=env, capture_output=True, text=True, check=True
+            ).stdout
+            samples.append(json.loads(output.strip().splitlines()[-1]))
+        imported = statistics.median(sample["import"] for sample in samples) * 1000
+        ready = statistics.median(sample["ready"] for sample in samples) * 1000
+        print(f"NLP_WARMUP={warmup:<5}: import {imported:8.1f} ms, startup to first /health {ready:8.1f} ms, "
+              f"total {imported + ready:8.1f} ms (median of {args.runs})")
+
+def main():
+    parser = argparse.ArgumentParser(description="MindfulAI maintenance commands")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    rebuild = subparsers.add_parser("rebuild-stats", help="Recompute per-user analytics aggregates")
+    rebuild.add_argument("--user-id", type=int, help="Only rebuild this user")
+    rebuild.set_defaults(func=rebuild_stats)
+    
+    backfill = subparsers.add_parser("backfill-keywords", help="Populate entry_keywords for existing entries")
+    backfill.add_argument("--batch-size", type=int, default=1000)
+    backfill.set_defaults(func=backfill_entry_keywords)
+    
+    patterns = subparsers.add_parser("compute-patterns", help="Materialize per-user patterns into user_patterns")
+    patterns.add_argument("--user-id", type=int, help="Only compute this user")
+    patterns.add_argument("--force", action="store_true", help="Recompute users whose stored patterns are still fresh")
+    patterns.add_argument("--workers", type=int, default=None, help="Worker processes (default: one per core)")
+    patterns.add_argument("--chunk-size", type=int, default=50, help="Users per worker task")
+    patterns.set_defaults(func=compute_patterns)
+    
+    purge = subparsers.add_parser("purge-refresh-tokens", help="Delete expired refresh-token families")
+    purge.set_defaults(func=purge_refresh_tokens)
+    
+    bench = subparsers.add_parser("bench-patterns", help="Benchmark the pattern engine on synthetic entries")
+    bench.add_argument("--sizes", type=int, nargs="+", default=[100, 1_000, 10_000, 100_000, 1_000_000])
+    bench.set_defaults(func=bench_patterns)
+    
+    paging = subparsers.add_parser("bench-pagination", help="Benchmark OFFSET against cursor pagination")
+    paging.add_argument("--pages", type=int, default=10_000)
+    paging.add_argument("--page-size", type=int, default=20)
+    paging.add_argument("--repeat", type=int, default=20)
+    paging.set_defaults(func=bench_pagination)
+    
+    memory = subparsers.add_parser("bench-memory", help="Compare peak memory of ORM loads and SQL aggregation")
+    memory.add_argument("--entries", type=int, default=50_000, help="Entries per user")
+    memory.add_argument("--users", type=int, default=2)
+    memory.add_argument("--content-words", type=int, default=150, help="Words of journal text per entry")
+    memory.set_defaults(func=bench_memory)
+    
+    api = subparsers.add_parser("bench-api", help="Benchmark API throughput at several concurrency levels")
+    api.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 128])
+    api.add_argument("--requests", type=int, default=600)
+    api.add_argument("--entries", type=int, default=2000, help="Entries to seed for the bench user")
+    api.set_defaults(func=bench_api)
+    
+    auth = subparsers.add_parser("bench-auth", help="Benchmark logins and non-auth latency during a login storm")
+    auth.add_argument("--logins", type=int, default=200)
+    auth.add_argument("--concurrency", type=int, default=16)
+    auth.add_argument("--probes", type=int, default=50, help="Idle GET /api/entries requests to time first")
+    auth.set_defaults(func=bench_auth)
+    
+    startup = subparsers.add_parser("bench-startup", help="Benchmark app import and time to the first /health request")
+    startup.add_argument("--runs", type=int, default=5, help="Fresh processes per NLP_WARMUP setting")
+    startup.set_defaults(func=bench_startup)
+    
+    args = parser.parse_args()
+    init_db()
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+import itertools
+import os
+import tempfile
+
+# The app reads its configuration at import time, so point it at a
+# throwaway database (and skip the NLP warmup) before importing it
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="mindfulai-tests-"), "test.db")
+os.environ["ENVIRONMENT"] = "test"
+os.environ["NLP_WARMUP"] = "false"
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services.nlp_cache import nlp_cache
+from app.services.nlp_service import NLTK_RESOURCES
+
+_user_ids = itertools.count(1)
+
+def nltk_data_installed() -> bool:
+    import nltk
+    try:
+        for path in NLTK_RESOURCES.values():
+            nltk.data.find(path)
+    except LookupError:
+        return False
+    return True
+
+def pytest_collection_modifyitems(config, items):
+    # The scorers raise without their corpora, and tests never download them
+    if nltk_data_installed():
+        return
+    skip = pytest.mark.skip(reason="NLTK corpora are not installed")
+    for item in items:
+        if "nltk_data" in item.keywords:
+            item.add_marker(skip)
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as test_client:
+        yield test_client
+
+@pytest.fixture
+def auth_headers(client):
+    """Sign up a new user and return its Authorization header"""
+    n = next(_user_ids)
+    response = client.post("/api/auth/signup", json={
+        "email": f"user{n}@example.com",
+        "username": f"user{n}",
+        "password": "password"
+    })
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+@pytest.fixture(autouse=True)
+def empty_nlp_cache():
+    # Cached analyses would hide how many times the scorers actually run
+    nlp_cache.clear()
+    yield
+    nlp_cache.clear()
@@ -0,0 +1,52 @@
+from datetime import datetime
+from unittest import mock
+import pytest
+from app.models import JournalEntry
+from app.services import agent_service
+from app.services.agent_service import build_analysis_context, get_ai_companion_response
+from app.services.lexicon_service import lexicon_matcher
+
+pytestmark = pytest.mark.nltk_data
+
+CONTENT = "I feel anxious about work and lonely at home. I need some support from my friends."
+
+@pytest.fixture
+def scorers():
+    """Spy on every scorer that AICompanion.build_context runs"""
+    with mock.patch.object(agent_service, "get_sentiment_score", wraps=agent_service.get_sentiment_score) as sentiment, \
+         mock.patch.object(agent_service, "extract_emotion_intensity", wraps=agent_service.extract_emotion_intensity) as intensity, \
+         mock.patch.object(lexicon_matcher, "scan", wraps=lexicon_matcher.scan) as scan:
+        yield {"sentiment": sentiment, "intensity": intensity, "scan": scan}
+
+def make_entry(content: str = CONTENT) -> JournalEntry:
+    return JournalEntry(id=1, user_id=1, title="Today", content=content, mood_level=2, created_at=datetime.utcnow())
+
+def test_companion_response_runs_each_scorer_once(scorers):
+    response = get_ai_companion_response(make_entry())
+
+    assert "anxiety" in response["detected_emotions"]
+    for name, scorer in scorers.items():
+        assert scorer.call_count == 1, name
+
+def test_companion_response_reuses_a_given_context(scorers):
+    entry = make_entry()
+    context = build_analysis_context(entry.content)
+    for scorer in scorers.values():
+        scorer.reset_mock()
+
+    response = get_ai_companion_response(entry, context)
+
+    assert response["reflection"] == context.reflection
+    for name, scorer in scorers.items():
+        assert scorer.call_count == 0, name
+
+def test_companion_endpoint_runs_each_scorer_once(client, auth_headers, scorers):
+    # The entry is analyzed on create; the companion then serves the stored analysis
+    created = client.post("/api/entries/", json={"title": "Today", "content": CONTENT, "mood_level": 2}, headers=auth_headers)
+    assert created.status_code == 200, created.text
+
+    response = client.get(f"/api/agent/companion/{created.json()['id']}", headers=auth_headers)
+
+    assert response.status_code == 200, response.text
+    for name, scorer in scorers.items():
+        assert scorer.call_count == 1, name
@@ -0,0 +1,54 @@
+import itertools
+import pytest
+
+_logins = itertools.count(1)
+
+@pytest.fixture
+def tokens(client):
+    """Sign up a new user and return its first token pair"""
+    n = next(_logins)
+    response = client.post("/api/auth/signup", json={
+        "email": f"auth{n}@example.com",
+        "username": f"auth{n}",
+        "password": "password"
+    })
+    assert response.status_code == 200, response.text
+    return response.json()
+
+def refresh(client, refresh_token: str):
+    return client.post("/api/auth/refresh", json={"refresh_token": refresh_token})
+
+def me(client, access_token: str):
+    return client.get("/api/auth/me", headers={"Authorization": f"Bearer {access_token}"})
+
+def test_refresh_rotates_the_token_pair(client, tokens):
+    response = refresh(client, tokens["refresh_token"])
+    assert response.status_code == 200, response.text
+    rotated = response.json()
+    
+    assert rotated["refresh_token"] != tokens["refresh_token"]
+    assert me(client, rotated["access_token"]).status_code == 200
+    assert refresh(client, rotated["refresh_token"]).status_code == 200
+
+def test_reusing_a_refresh_token_revokes_the_family(client, tokens):
+    rotated = refresh(client, tokens["refresh_token"]).json()
+    
+    assert refresh(client, tokens["refresh_token"]).status_code == 401
+    # The legitimate holder's newer token went down with the family
+    assert refresh(client, rotated["refresh_token"]).status_code == 401
+
+def test_other_logins_survive_a_revoked_family(client, tokens):
+    email = me(client, tokens["access_token"]).json()["email"]
+    other = client.post("/api/auth/login", json={"email": email, "password": "password"}).json()
+    refresh(client, tokens["refresh_token"])
+    refresh(client, tokens["refresh_token"])
+    
+    assert refresh(client, other["refresh_token"]).status_code == 200
+
+def test_refresh_token_is_not_an_access_token(client, tokens):
+    assert me(client, tokens["refresh_token"]).status_code == 401
+    assert refresh(client, tokens["access_token"]).status_code == 401
+
+def test_logout_revokes_the_refresh_token(client, tokens):
+    assert client.post("/api/auth/logout", json={"refresh_token": tokens["refresh_token"]}).status_code == 200
+    assert refresh(client, tokens["refresh_token"]).status_code == 401
@@ -0,0 +1,73 @@
+import json
+from unittest import mock
+import httpx
+import pytest
+from sqlalchemy.exc import OperationalError
+from app.api.routes import entries
+from app.main import app
+
+def line(title: str, content: str = "A quiet day.") -> bytes:
+    return json.dumps({"title": title, "content": content}).encode() + b"\n"
+
+@pytest.fixture
+def bulk(client, auth_headers):
+    """POST the chunks as one streamed body, each chunk its own ASGI message"""
+    def post(chunks: list) -> dict:
+        async def send() -> httpx.Response:
+            async def body():
+                for chunk in chunks:
+                    yield chunk
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as test_client:
+                return await test_client.post("/api/entries/bulk", content=body(), headers=auth_headers)
+        response = client.portal.call(send)
+        assert response.status_code == 200, response.text
+        return response.json()
+    return post
+
+def titles(client, auth_headers) -> list:
+    return sorted(entry["title"] for entry in client.get("/api/entries/", headers=auth_headers).json())
+
+def test_lines_split_across_chunks(client, auth_headers, bulk):
+    body = line("a") + line("b") + line("c").rstrip(b"\n")
+    chunks = [body[:7], body[7:30], body[30:31], body[31:]]
+    
+    assert bulk(chunks) == {"imported": 3, "failed": 0, "errors": []}
+    assert titles(client, auth_headers) == ["a", "b", "c"]
+
+def test_oversized_lines_are_rejected_whole_or_streamed(bulk):
+    oversized = line("big", "x" * 200)
+    with mock.patch.object(entries, "BULK_MAX_LINE_BYTES", 100):
+        # Complete inside one chunk, then split over several chunks, then unterminated at the end
+        result = bulk([line("ok") + oversized, oversized[:60], oversized[60:], line("ok2") + oversized.rstrip(b"\n")])
+    
+    assert result["imported"] == 2
+    assert result["errors"] == [{"line": n, "error": "Line exceeds 100 bytes"} for n in (2, 3, 5)]
+
+def test_bad_json_and_schema_lines_are_reported(bulk):
+    result = bulk([line("ok"), b"{not json\n", b'{"title": "no content"}\n', b"\n", line("ok2")])
+    
+    assert result["imported"] == 2
+    assert [error["line"] for error in result["errors"]] == [2, 3]
+    assert result["errors"][0]["error"].startswith("Invalid JSON")
+    assert "content" in result["errors"][1]["error"]
+
+def test_failed_chunk_rolls_back_and_keeps_earlier_chunks(client, auth_headers, bulk):
+    insert_batch = entries._insert_batch
+    calls = []
+    
+    def failing_second_chunk(db, user_id, rows):
+        calls.append(len(rows))
+        insert_batch(db, user_id, rows)
+        if len(calls) == 2:
+            raise OperationalError("INSERT", {}, Exception("disk I/O error"))
+    
+    with mock.patch.object(entries, "BULK_CHUNK_SIZE", 2), mock.patch.object(entries, "_insert_batch", failing_second_chunk):
+        result = bulk([b"".join(line(title) for title in "abcde")])
+    
+    assert result == {"imported": 3, "failed": 2, "errors": [
+        {"line": 3, "error": "Import failed: OperationalError"},
+        {"line": 4, "error": "Import failed: OperationalError"},
+    ]}
+    assert titles(client, auth_headers) == ["a", "b", "e"]
+    assert client.get("/api/analytics/summary", headers=auth_headers).json()["total_entries"] == 3
@@ -0,0 +1,36 @@
+import asyncio
+from unittest import mock
+import pytest
+from app.database import SessionLocal
+from app.models import AnalysisJob, JournalEntry
+from app.services.ingest_queue import AnalysisQueue
+from app.services.worker_pool import PoolSaturatedError, nlp_pool
+
+@pytest.fixture
+def claimed_job(client, auth_headers):
+    """A pending entry whose job is already claimed, so the app's own queue leaves it alone"""
+    user_id = client.get("/api/auth/me", headers=auth_headers).json()["id"]
+    with SessionLocal() as db:
+        entry = JournalEntry(user_id=user_id, title="Queued", content="A calm day.", mood_level=2, analysis_status="pending")
+        job = AnalysisJob(entry=entry, status="running")
+        db.add_all([entry, job])
+        db.commit()
+        return job.id, entry.id
+
+def job_state(job_id: int, entry_id: int) -> tuple:
+    with SessionLocal() as db:
+        job = db.get(AnalysisJob, job_id)
+        return job.status, job.attempts, job.claimed_at, db.get(JournalEntry, entry_id).analysis_status
+
+def test_saturated_pool_returns_the_job_without_counting_an_attempt(claimed_job):
+    queue = AnalysisQueue(max_attempts=1)
+    with mock.patch.object(nlp_pool, "run", side_effect=PoolSaturatedError("nlp pool is saturated")):
+        assert asyncio.run(queue._process(claimed_job[0])) is False
+        assert job_state(*claimed_job) == ("pending", 0, None, "pending")
+
+def test_failed_analysis_counts_an_attempt(claimed_job):
+    queue = AnalysisQueue(max_attempts=2)
+    with mock.patch.object(nlp_pool, "run", side_effect=RuntimeError("model crashed")):
+        assert asyncio.run(queue._process(claimed_job[0])) is True
+        status, attempts, _, entry_status = job_state(*claimed_job)
+        assert (status, attempts, entry_status) == ("pending", 1, "pending")
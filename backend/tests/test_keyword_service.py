@@ -0,0 +1,25 @@
+from datetime import datetime
+from sqlalchemy import insert
+from app.database import SessionLocal, init_db
+from app.models import JournalEntry, EntryKeyword
+from app.services.stats_service import rebuild_user_stats
+
+def test_init_db_backfills_keywords_of_entries_from_before_entry_keywords(client, auth_headers):
+    user_id = client.get("/api/auth/me", headers=auth_headers).json()["id"]
+    # Written the way the baseline schema did: only the comma-joined column
+    with SessionLocal() as db:
+        db.execute(insert(JournalEntry), [
+            {"user_id": user_id, "title": f"Old {i}", "content": "A happy walk in the park.",
+             "sentiment_score": 0.5, "mood_level": 3, "keywords": keywords, "created_at": datetime(2024, 1, i + 1)}
+            for i, keywords in enumerate(["happy,walk,park", "walk,park", "walk"])
+        ])
+        rebuild_user_stats(db, user_id)
+        db.commit()
+    
+    init_db()
+    init_db()
+    
+    with SessionLocal() as db:
+        assert db.query(EntryKeyword).filter(EntryKeyword.user_id == user_id).count() == 6
+    summary = client.get("/api/analytics/summary", headers=auth_headers).json()
+    assert summary["most_common_keywords"] == ["walk", "park", "happy"]
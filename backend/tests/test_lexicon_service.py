@@ -0,0 +1,40 @@
+import pytest
+from app.services.lexicon_service import lexicon_matcher, word_forms
+
+def phrases(text: str) -> set:
+    return {match.phrase for match in lexicon_matcher.scan(text)}
+
+@pytest.mark.parametrize("word, forms", [
+    ("bills", ("bills", "bill")),
+    ("worries", ("worries", "worry")),
+    ("classes", ("classes", "class", "classe")),
+    ("writing", ("writing", "writ", "write")),
+    ("stopped", ("stopped", "stopp", "stoppe", "stop")),
+    ("was", ("was",)),
+    ("class", ("class",)),
+    ("stress", ("stress",)),
+    ("need", ("need",)),
+    ("freed", ("freed",)),
+])
+def test_word_forms(word, forms):
+    assert word_forms(word) == forms
+
+def test_keywords_match_whole_words_only():
+    assert "ill" not in phrases("The bills are piling up.")
+    assert "bill" in phrases("The bills are piling up.")
+    assert "do" not in phrases("I don't know what to think.")
+    assert "don't know" in phrases("I don’t know what to think.")
+    assert "am" not in phrases("I came home early.")
+
+def test_inflected_words_match_their_base_keyword():
+    found = phrases("Meetings all day, then dinner with friends.")
+    assert {"meeting", "friend"} <= found
+
+def test_ed_words_reach_an_eed_keyword():
+    # "need" is never stripped itself, but "needed" reaches it through its -ed stem
+    assert "need" in phrases("I needed that.")
+
+def test_overlapping_phrases_are_all_reported():
+    matches = [m for m in lexicon_matcher.scan("I need to rest.") if m.lexicon == "need"]
+    assert {(m.phrase, m.start, m.end) for m in matches} >= {("need", 2, 6), ("need to", 2, 9), ("rest", 10, 14)}
+    assert lexicon_matcher.labels(matches, "need") == ["support", "action", "rest"]
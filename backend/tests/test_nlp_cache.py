@@ -0,0 +1,62 @@
+from unittest import mock
+import pytest
+from app.database import SessionLocal
+from app.models import EntryAnalysis
+from app.services import agent_service, nlp_service
+from app.services.agent_service import DEFAULT_REFLECTION
+from app.services.nlp_cache import cached_by_content, nlp_cache
+from app.services.nlp_service import score_or_default
+
+INTENSITY = {"positive_intensity": 0, "negative_intensity": 0.5, "emotional_words_count": 2,
+             "avg_sentence_sentiment": -0.5, "sentiment_variance": 0}
+
+def test_results_are_cached_and_failures_are_not():
+    calls = []
+    
+    @cached_by_content("test")
+    def scorer(text):
+        calls.append(text)
+        if len(calls) == 1:
+            raise RuntimeError("model unavailable")
+        return {"length": len(text)}
+    
+    assert score_or_default(scorer, "some text", {}) == {}
+    assert scorer("some text") == {"length": 9}
+    assert scorer("some text") == {"length": 9}
+    assert len(calls) == 2
+
+def test_failing_scorer_raises_through_the_cache():
+    with mock.patch.object(nlp_service, "get_vader", side_effect=RuntimeError("no VADER")):
+        with pytest.raises(RuntimeError):
+            nlp_service.get_sentiment_score("A good day.")
+        assert score_or_default(nlp_service.get_sentiment_score, "A good day.", 0.0) == 0.0
+    assert nlp_cache.stats()["size"] == 0
+
+def stored_analysis(entry_id: int):
+    with SessionLocal() as db:
+        return db.query(EntryAnalysis).filter(EntryAnalysis.entry_id == entry_id).first()
+
+def test_failed_analysis_is_not_stored_and_is_retried(client, auth_headers):
+    with mock.patch.object(agent_service, "extract_emotion_intensity", side_effect=RuntimeError("no corpora")):
+        entry = client.post("/api/entries/", json={"title": "Rough", "content": "Sad and tired today.", "mood_level": 1}, headers=auth_headers).json()
+        companion = client.get(f"/api/agent/companion/{entry['id']}", headers=auth_headers).json()
+    
+    assert companion["reflection"] == DEFAULT_REFLECTION
+    assert stored_analysis(entry["id"]) is None
+    
+    with mock.patch.object(agent_service, "extract_emotion_intensity", return_value=INTENSITY):
+        companion = client.get(f"/api/agent/companion/{entry['id']}", headers=auth_headers).json()
+    
+    assert "sadness" in companion["detected_emotions"]
+    assert stored_analysis(entry["id"]).emotions == companion["detected_emotions"]
+
+def test_failed_reanalysis_drops_the_stale_row(client, auth_headers):
+    with mock.patch.object(agent_service, "extract_emotion_intensity", return_value=INTENSITY):
+        entry = client.post("/api/entries/", json={"title": "Rough", "content": "Sad and tired today.", "mood_level": 1}, headers=auth_headers).json()
+    assert stored_analysis(entry["id"]) is not None
+    
+    with mock.patch.object(agent_service, "extract_emotion_intensity", side_effect=RuntimeError("no corpora")):
+        response = client.put(f"/api/entries/{entry['id']}", json={"content": "Happy and grateful now."}, headers=auth_headers)
+    
+    assert response.status_code == 200, response.text
+    assert stored_analysis(entry["id"]) is None
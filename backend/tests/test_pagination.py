@@ -0,0 +1,36 @@
+import json
+import pytest
+
+@pytest.fixture
+def entries(client, auth_headers):
+    """Seven entries, mostly sharing created_at values so only the id breaks ties"""
+    stamps = ["2024-05-01T09:00:00"] * 3 + ["2024-05-02T09:00:00"] * 3 + ["2024-04-30T09:00:00"]
+    body = "\n".join(json.dumps({"title": f"Entry {i}", "content": "Same time.", "created_at": stamp}) for i, stamp in enumerate(stamps))
+    response = client.post("/api/entries/bulk", content=body, headers=auth_headers)
+    assert response.status_code == 200 and response.json()["imported"] == 7, response.text
+    return client.get("/api/entries/", params={"limit": 50}, headers=auth_headers).json()
+
+def test_cursor_pages_through_tied_timestamps(client, auth_headers, entries):
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/api/entries/", params=params, headers=auth_headers)
+        assert response.status_code == 200, response.text
+        seen.extend(entry["id"] for entry in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+    
+    assert seen == [entry["id"] for entry in entries]
+    assert [entry["title"] for entry in entries] == ["Entry 5", "Entry 4", "Entry 3", "Entry 2", "Entry 1", "Entry 0", "Entry 6"]
+
+def test_last_page_has_no_next_cursor(client, auth_headers, entries):
+    response = client.get("/api/entries/", params={"limit": 7}, headers=auth_headers)
+    assert len(response.json()) == 7
+    assert "X-Next-Cursor" not in response.headers
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", "W10", "WyJ5ZXN0ZXJkYXkiLDFd"])
+def test_malformed_cursor_is_rejected(client, auth_headers, cursor):
+    response = client.get("/api/entries/", params={"cursor": cursor}, headers=auth_headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
@@ -0,0 +1,93 @@
+import random
+from collections import Counter
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+import pytest
+from app.database import SessionLocal
+from app.models import JournalEntry
+from app.schemas import PatternResult
+from app.services.keyword_service import set_entry_keywords, split_keywords
+from app.services.pattern_service import find_mood_patterns, find_mood_sequences, load_entry_columns
+
+VOCABULARY = ["work", "sleep", "family", "rain", "deadline", "run", "tea"]
+
+def reference_patterns(entries) -> list:
+    """The loops the NumPy engine replaced, plus its one intended change: sequence triggers are deduplicated"""
+    if len(entries) < 3:
+        return []
+    
+    def grouped(key_lists, threshold, trigger):
+        groups = {}
+        for entry, keys in zip(entries, key_lists):
+            for key in keys:
+                groups.setdefault(key, []).append(entry.sentiment_score)
+        return [
+            PatternResult(trigger=trigger.format(key), confidence=min(len(s) / len(entries), 1.0),
+                          frequency=len(s), avg_sentiment_impact=round(sum(s) / len(s), 2))
+            for key, s in groups.items() if len(s) >= 2 and sum(s) / len(s) < threshold
+        ]
+    
+    patterns = grouped([split_keywords(e.keywords) for e in entries], -0.3, "Entries mentioning '{}'")
+    patterns += grouped([[e.created_at.strftime("%A")] for e in entries], -0.2, "Mood pattern on {}s")
+    
+    ordered = sorted(entries, key=lambda e: e.created_at)
+    seen = set()
+    for i in range(len(ordered) - 2):
+        window = ordered[i:i + 3]
+        sentiments = [e.sentiment_score for e in window]
+        if not all(s < -0.3 for s in sentiments):
+            continue
+        counts = Counter(kw for e in window for kw in split_keywords(e.keywords))
+        for keyword in [kw for kw, count in counts.most_common(3) if count >= 2]:
+            if keyword not in seen:
+                seen.add(keyword)
+                patterns.append(PatternResult(trigger=f"Consecutive low mood with '{keyword}'", confidence=0.7,
+                                              frequency=3, avg_sentiment_impact=round(sum(sentiments) / len(sentiments), 2)))
+    
+    return sorted(patterns, key=lambda p: p.confidence, reverse=True)[:5]
+
+def random_entries(rng: random.Random) -> list:
+    start = datetime(2024, 3, 1)
+    return [
+        SimpleNamespace(
+            created_at=start + timedelta(hours=rng.randrange(24 * 21)),
+            sentiment_score=round(rng.uniform(-1, 0.4), 2),
+            mood_level=rng.choice([None, 1, 2, 3, 4, 5]),
+            keywords=",".join(rng.sample(VOCABULARY, rng.randrange(4)))
+        )
+        for _ in range(rng.randrange(60))
+    ]
+
+@pytest.mark.parametrize("seed", range(50))
+def test_matches_the_reference_loops_on_random_entries(seed):
+    entries = random_entries(random.Random(seed))
+    assert find_mood_patterns(entries) == reference_patterns(entries)
+
+def test_long_low_run_reports_each_keyword_once():
+    start = datetime(2024, 3, 4)
+    entries = [
+        SimpleNamespace(created_at=start + timedelta(days=i), sentiment_score=-0.6, mood_level=1, keywords="work,rain")
+        for i in range(5)
+    ]
+    
+    assert [p.trigger for p in find_mood_sequences(entries)] == [
+        "Consecutive low mood with 'work'",
+        "Consecutive low mood with 'rain'",
+    ]
+
+def test_load_entry_columns_matches_the_entries(client, auth_headers):
+    user_id = client.get("/api/auth/me", headers=auth_headers).json()["id"]
+    rng = random.Random(7)
+    with SessionLocal() as db:
+        for entry in random_entries(rng) + random_entries(rng):
+            row = JournalEntry(user_id=user_id, title="Entry", content="Entry", created_at=entry.created_at,
+                               sentiment_score=entry.sentiment_score, mood_level=entry.mood_level)
+            set_entry_keywords(row, entry.keywords)
+            db.add(row)
+        db.commit()
+        
+        entries = db.query(JournalEntry).filter(JournalEntry.user_id == user_id).order_by(JournalEntry.id).all()
+        columns = load_entry_columns(db, user_id)
+    
+    assert len(columns) == len(entries)
+    assert find_mood_patterns(columns) == find_mood_patterns(entries) == reference_patterns(entries)
@@ -0,0 +1,99 @@
+import json
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import event, insert
+from app.database import SessionLocal, async_engine, engine
+from app.models import JournalEntry
+from app.services.stats_service import rebuild_user_stats
+
+SEED_ENTRIES = 200
+
+def plan_problems(plan: list, statement: str) -> list:
+    """
+    EXPLAIN QUERY PLAN lines that mean a full scan or an extra sort
+    Sorting rows an index search already narrowed is allowed: aggregated
+    results (GROUP BY buckets, keyword counts) and full-text matches ranked
+    by bm25. So are scans and sorts of a materialized LIMIT subquery, and
+    scans of the full-text index itself, which SQLite reports as a
+    virtual-table scan.
+    """
+    materialized = {line.split()[-1] for line in plan if line.startswith("MATERIALIZE")}
+    narrowed = "GROUP BY" in statement.upper() or " MATCH " in statement.upper() or bool(materialized)
+    problems = []
+    for line in plan:
+        if line.startswith("SCAN"):
+            if line != "SCAN CONSTANT ROW" and "VIRTUAL TABLE INDEX" not in line and line.split()[1] not in materialized:
+                problems.append(line)
+        elif "TEMP B-TREE" in line and not narrowed:
+            problems.append(line)
+    return problems
+
+@pytest.fixture
+def seeded_headers(client, auth_headers):
+    """A user with SEED_ENTRIES entries written straight to the table, none of them analyzed yet"""
+    user_id = client.get("/api/auth/me", headers=auth_headers).json()["id"]
+    start = datetime.utcnow() - timedelta(days=60)
+    with SessionLocal() as db:
+        db.execute(insert(JournalEntry), [
+            {"user_id": user_id, "title": f"Entry {i}", "content": "A calm and ordinary day at work.",
+             "sentiment_score": (i % 7 - 3) / 3, "mood_level": i % 5 + 1, "keywords": "",
+             "created_at": start + timedelta(hours=i * 6)}
+            for i in range(SEED_ENTRIES)
+        ])
+        rebuild_user_stats(db, user_id)
+        db.commit()
+    return auth_headers
+
+@pytest.fixture
+def captured_sql():
+    """Every distinct SELECT, UPDATE and DELETE the routes send, with its first parameters"""
+    captured = {}
+    
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")):
+            captured.setdefault(statement, parameters)
+    
+    event.listen(async_engine.sync_engine, "before_cursor_execute", capture)
+    yield captured
+    event.remove(async_engine.sync_engine, "before_cursor_execute", capture)
+
+def drive_routes(client, headers):
+    def call(method: str, path: str, **kwargs):
+        response = client.request(method, path, headers=headers, **kwargs)
+        assert response.status_code == 200, f"{method} {path}: {response.text}"
+        return response
+    
+    entry = call("POST", "/api/entries/", json={"title": "Plans", "content": "Checking query plans today.", "mood_level": 3}).json()
+    page = call("GET", "/api/entries/", params={"limit": 5})
+    call("GET", "/api/entries/", params={"limit": 5, "cursor": page.headers["X-Next-Cursor"]})
+    call("GET", f"/api/entries/{entry['id']}")
+    call("PUT", f"/api/entries/{entry['id']}", json={"content": "Checking query plans again."})
+    call("GET", "/api/entries/search", params={"q": "calm ord"})
+    call("GET", "/api/entries/search", params={"q": "ordin"})
+    call("POST", "/api/entries/bulk", content="\n".join(
+        json.dumps({"title": f"Imported {i}", "content": "An imported calm day."}) for i in range(3)
+    ))
+    call("POST", "/api/agent/followup", json={"entry_id": entry["id"]})
+    call("GET", f"/api/agent/followups/{entry['id']}")
+    call("GET", f"/api/agent/companion/{entry['id']}")
+    # The default window falls through to the windowed query and refresh_recent_labels,
+    # since the seeded entries have no analyses yet
+    call("GET", "/api/agent/patterns")
+    call("GET", "/api/agent/patterns", params={"window": 20, "days": 30})
+    call("GET", "/api/analytics/summary")
+    for resolution in ("raw", "day", "week"):
+        call("GET", "/api/analytics/trends", params={"days": 30, "resolution": resolution})
+    call("DELETE", f"/api/entries/{entry['id']}")
+
+def test_route_queries_use_indexes(client, seeded_headers, captured_sql):
+    drive_routes(client, seeded_headers)
+    
+    failures = []
+    with engine.connect() as conn:
+        for statement, parameters in captured_sql.items():
+            plan = [row[-1] for row in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).all()]
+            if plan_problems(plan, statement):
+                failures.append(" ".join(statement.split()) + "\n    " + "\n    ".join(plan))
+    
+    assert captured_sql
+    assert not failures, "Full scans or sorts:\n" + "\n".join(failures)
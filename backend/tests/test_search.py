@@ -0,0 +1,52 @@
+import pytest
+from app.services.search_service import fts5_query, mark_prefix
+
+@pytest.fixture
+def search(client, auth_headers):
+    for title, content in [
+        ("Evening", "Feeling lonely again after the move."),
+        ("Weekend", "So much happiness at the lake with my sister."),
+        ("Work", "Running late, the meetings kept piling up."),
+    ]:
+        response = client.post("/api/entries/", json={"title": title, "content": content, "mood_level": 2}, headers=auth_headers)
+        assert response.status_code == 200, response.text
+    
+    def run(q: str) -> list:
+        response = client.get("/api/entries/search", params={"q": q}, headers=auth_headers)
+        assert response.status_code == 200, response.text
+        return [result["title"] for result in response.json()]
+    return run
+
+def test_fts5_query_splits_whole_words_from_the_prefix():
+    assert fts5_query("feeling lonel") == ('"feeling"', '"lonel"*')
+    assert fts5_query("happin") == ("", '"happin"*')
+    assert fts5_query("  ...  ") == ("", "")
+
+@pytest.mark.parametrize("q", ["lonel", "happin", "pil"])
+def test_partial_last_word_matches(search, q):
+    assert len(search(q)) == 1
+
+def test_whole_words_are_stemmed(search):
+    assert search("run meeting") == ["Work"]
+    assert search("feel lonel") == ["Evening"]
+
+def test_every_word_must_match(search):
+    assert search("lonely lake") == []
+
+def test_edited_entries_are_reindexed(client, auth_headers, search):
+    entry = client.get("/api/entries/", headers=auth_headers).json()[-1]
+    response = client.put(f"/api/entries/{entry['id']}", json={"content": "Quiet evening with tea."}, headers=auth_headers)
+    assert response.status_code == 200, response.text
+    
+    assert search("lonel") == []
+    assert search("tea") == [entry["title"]]
+
+def test_mark_prefix_skips_existing_marks():
+    assert mark_prefix("<mark>Running</mark> late, running out", "runn") == "<mark>Running</mark> late, <mark>running</mark> out"
+    assert mark_prefix("a prune and a run", "run") == "a prune and a <mark>run</mark>"
+
+def test_snippet_marks_every_word_of_a_multi_word_search(client, auth_headers, search):
+    response = client.get("/api/entries/search", params={"q": "running meetin"}, headers=auth_headers)
+    snippet = response.json()[0]["snippet"]
+    assert "<mark>Running</mark>" in snippet
+    assert "<mark>meetings</mark>" in snippet
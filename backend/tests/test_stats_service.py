@@ -0,0 +1,61 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import pytest
+from app.database import SessionLocal
+from app.models import EntryAnalysis, JournalEntry, UserStats
+from app.services.agent_service import ANALYZER_VERSION
+from app.services.stats_service import rebuild_user_stats, summarize_stats
+
+def stats_pair(user_id: int) -> tuple:
+    """(summary as maintained by the writes, summary recounted from the entries)"""
+    with SessionLocal() as db:
+        kept = summarize_stats(db.query(UserStats).filter(UserStats.user_id == user_id).one())
+        rebuilt = summarize_stats(rebuild_user_stats(db, user_id))
+        db.rollback()
+    return kept, rebuilt
+
+def test_concurrent_writes_keep_stats_exact(client, auth_headers):
+    user_id = client.get("/api/auth/me", headers=auth_headers).json()["id"]
+    
+    def create(i: int) -> dict:
+        response = client.post("/api/entries/", json={
+            "title": f"Entry {i}", "content": "A happy walk." if i % 2 else "A sad, tiring day.", "mood_level": i % 5
+        }, headers=auth_headers)
+        assert response.status_code == 200, response.text
+        return response.json()
+    
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        entries = list(pool.map(create, range(40)))
+    
+    def change(entry: dict):
+        if entry["id"] % 3 == 0:
+            response = client.delete(f"/api/entries/{entry['id']}", headers=auth_headers)
+        else:
+            response = client.put(f"/api/entries/{entry['id']}", json={"mood_level": 4, "content": "Calm again."}, headers=auth_headers)
+        assert response.status_code == 200, response.text
+    
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        futures = [pool.submit(change, entry) for entry in entries[:20]]
+        futures += [pool.submit(create, i) for i in range(40, 50)]
+        for future in futures:
+            future.result()
+    
+    kept, rebuilt = stats_pair(user_id)
+    assert kept["total_entries"] == rebuilt["total_entries"]
+    assert kept["mood_distribution"] == rebuilt["mood_distribution"]
+    assert kept["avg_sentiment"] == pytest.approx(rebuilt["avg_sentiment"], abs=0.01)
+
+def test_recent_labels_are_counted_newest_first(client, auth_headers):
+    user_id = client.get("/api/auth/me", headers=auth_headers).json()["id"]
+    # Ids and recency disagree, and every emotion ties at one mention
+    days = [3, 1, 4, 5, 2]
+    with SessionLocal() as db:
+        for day in days:
+            entry = JournalEntry(user_id=user_id, title="Entry", content="Entry", created_at=datetime(2024, 6, day))
+            entry.analysis = EntryAnalysis(analyzer_version=ANALYZER_VERSION, emotions=[f"day{day}"], themes=[], needs=[])
+            db.add(entry)
+        db.flush()
+        stats = rebuild_user_stats(db, user_id)
+        
+        assert list(stats.emotion_counts) == [f"day{day}" for day in sorted(days, reverse=True)]
+        db.rollback()
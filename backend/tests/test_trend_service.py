@@ -0,0 +1,37 @@
+import random
+from datetime import datetime, timedelta
+import pytest
+from app.services.trend_service import downsample_points, lttb_indices
+
+@pytest.mark.parametrize("seed", range(20))
+def test_lttb_keeps_the_ends_and_threshold_points(seed):
+    rng = random.Random(seed)
+    n = rng.randrange(4, 500)
+    threshold = rng.randrange(3, n)
+    xs = sorted(rng.uniform(0, 1e6) for _ in range(n))
+    ys = [rng.uniform(-1, 1) for _ in range(n)]
+    
+    indices = lttb_indices(xs, ys, threshold)
+    
+    assert len(indices) == threshold
+    assert indices[0] == 0 and indices[-1] == n - 1
+    assert all(a < b for a, b in zip(indices, indices[1:]))
+
+@pytest.mark.parametrize("n, threshold", [(0, 5), (1, 5), (5, 5), (4, 10), (10, 2)])
+def test_lttb_returns_small_inputs_whole(n, threshold):
+    assert lttb_indices(list(range(n)), [0.0] * n, threshold) == list(range(n))
+
+def test_lttb_keeps_a_spike():
+    ys = [0.0] * 100
+    ys[37] = -1.0
+    assert 37 in lttb_indices(list(range(100)), ys, 10)
+
+def test_downsample_points():
+    start = datetime(2024, 1, 1)
+    points = [{"date": (start + timedelta(days=i)).isoformat(), "sentiment": None if i % 4 else i / 100} for i in range(60)]
+    
+    reduced = downsample_points(points, 12)
+    assert len(reduced) == 12
+    assert reduced[0] is points[0] and reduced[-1] is points[-1]
+    assert downsample_points(points, 60) is points
+    assert downsample_points(points, None) is points
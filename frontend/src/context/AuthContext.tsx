@@ -1,5 +1,5 @@
 import { createContext, useContext, useState, useCallback, ReactNode } from 'react'
-import { authService } from '../services/api'
+import { authService, storeTokens, clearTokens } from '../services/api'
 
 interface User {
   id: number
@@ -29,8 +29,8 @@ export const AuthProvider = ({ children }: { children: ReactNode }) => {
     setLoading(true)
     try {
       const response = await authService.login(email, password)
-      const { access_token } = response.data
-      localStorage.setItem('access_token', access_token)
+      const { access_token, refresh_token } = response.data
+      storeTokens(access_token, refresh_token)
       setToken(access_token)
       
       try {
@@ -49,8 +49,8 @@ export const AuthProvider = ({ children }: { children: ReactNode }) => {
     setLoading(true)
     try {
       const response = await authService.signup(email, username, password)
-      const { access_token } = response.data
-      localStorage.setItem('access_token', access_token)
+      const { access_token, refresh_token } = response.data
+      storeTokens(access_token, refresh_token)
       setToken(access_token)
       
       try {
@@ -66,7 +66,12 @@ export const AuthProvider = ({ children }: { children: ReactNode }) => {
   }, [])
 
   const logout = useCallback(() => {
-    localStorage.removeItem('access_token')
+    const refresh_token = localStorage.getItem('refresh_token')
+    if (refresh_token) {
+      // Best effort: the session ends locally even if revoking it fails
+      authService.logout(refresh_token).catch(() => {})
+    }
+    clearTokens()
     setToken(null)
     setUser(null)
   }, [])
@@ -27,7 +27,7 @@ export default function AnalyticsPage() {
       try {
         const [analyticsRes, trendsRes] = await Promise.all([
           analyticsService.getSummary(),
-          analyticsService.getTrends(timeRange),
+          analyticsService.getTrends(timeRange, 'day', 30),
         ])
         setAnalytics(analyticsRes.data)
         setTrends(Array.isArray(trendsRes.data?.trends) ? trendsRes.data.trends : [])
@@ -51,7 +51,6 @@ export default function AnalyticsPage() {
   }
 
   const chartData = trends
-    .slice(-Math.min(30, trends.length))
     .map((t) => ({
       date: new Date(t.date).toLocaleDateString('en-US', { month: 'short', day: 'numeric' }),
       sentiment: Math.round(t.sentiment || 0),
@@ -17,12 +17,54 @@ api.interceptors.request.use((config) => {
   return config
 })
 
+export const storeTokens = (access_token: string, refresh_token?: string) => {
+  localStorage.setItem('access_token', access_token)
+  if (refresh_token) {
+    localStorage.setItem('refresh_token', refresh_token)
+  }
+}
+
+export const clearTokens = () => {
+  localStorage.removeItem('access_token')
+  localStorage.removeItem('refresh_token')
+}
+
+// One refresh at a time: each refresh token is single-use, and a second
+// request presenting it would look like reuse and revoke the session.
+let refreshing: Promise<string> | null = null
+
+const refreshAccessToken = (): Promise<string> => {
+  if (!refreshing) {
+    const refresh_token = localStorage.getItem('refresh_token')
+    refreshing = (
+      refresh_token
+        ? axios.post(`${API_BASE_URL}/auth/refresh`, { refresh_token }).then((response) => {
+            storeTokens(response.data.access_token, response.data.refresh_token)
+            return response.data.access_token as string
+          })
+        : Promise.reject(new Error('No refresh token'))
+    ).finally(() => {
+      refreshing = null
+    })
+  }
+  return refreshing
+}
+
 api.interceptors.response.use(
   (response) => response,
-  (error) => {
-    if (error.response?.status === 401) {
-      localStorage.removeItem('access_token')
-      window.location.href = '/login'
+  async (error) => {
+    const original = error.config
+    const isAuthCall = original?.url?.startsWith('/auth/') && original.url !== '/auth/me'
+    if (error.response?.status === 401 && original && !original._retried && !isAuthCall) {
+      original._retried = true
+      try {
+        const token = await refreshAccessToken()
+        original.headers.Authorization = `Bearer ${token}`
+        return api(original)
+      } catch {
+        clearTokens()
+        window.location.href = '/login'
+      }
     }
     return Promise.reject(error)
   }
@@ -34,13 +76,20 @@ export const authService = {
   login: (email: string, password: string) =>
     api.post('/auth/login', { email, password }),
   getMe: () => api.get('/auth/me'),
+  refresh: (refresh_token: string) =>
+    api.post('/auth/refresh', { refresh_token }),
+  logout: (refresh_token: string) =>
+    api.post('/auth/logout', { refresh_token }),
 }
 
 export const entriesService = {
   create: (title: string, content: string, mood_level: number) =>
     api.post('/entries/', { title, content, mood_level }),
-  getAll: (limit = 50, offset = 0) =>
-    api.get('/entries/', { params: { limit, offset } }),
+  // Pass the previous response's x-next-cursor header as `cursor` to keep paging
+  getAll: (limit = 50, offset = 0, cursor?: string) =>
+    api.get('/entries/', { params: { limit, offset, cursor } }),
+  search: (q: string, limit = 20) =>
+    api.get('/entries/search', { params: { q, limit } }),
   getById: (id: number) => api.get(`/entries/${id}`),
   update: (id: number, data: any) => api.put(`/entries/${id}`, data),
   delete: (id: number) => api.delete(`/entries/${id}`),
@@ -59,6 +108,10 @@ export const agentService = {
 
 export const analyticsService = {
   getSummary: () => api.get('/analytics/summary'),
-  getTrends: (days = 30) =>
-    api.get('/analytics/trends', { params: { days } }),
+  getTrends: (
+    days = 30,
+    resolution: 'raw' | 'day' | 'week' | 'month' = 'raw',
+    max_points?: number
+  ) =>
+    api.get('/analytics/trends', { params: { days, resolution, max_points } }),
 }